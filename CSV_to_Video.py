@@ -1,10 +1,10 @@
-import pandas as pd
 import pygame
-import math
 import sys
+from trajectory_io import load_trajectory
 
-# Load the CSV data
-df = pd.read_csv("coin_positions.csv", index_col=0)
+# Load the trajectory (.npz, or a legacy "x--y" .csv)
+path = sys.argv[1] if len(sys.argv) > 1 else "coin_positions.npz"
+positions = load_trajectory(path, mmap=True).positions
 
 # Initialize Pygame
 pygame.init()
@@ -49,12 +49,11 @@ while running:
     pygame.draw.rect(screen, white, (25, 25, width - 50, height - 50), 5)
 
     # Get positions for the current frame
-    frame_data = df.loc[frame_index].tolist()
+    frame_data = positions[frame_index].tolist()
 
     # Create and draw coins based on the positions
     coins = []
-    for pos in frame_data:
-        x, y = map(float,pos.split("--"))
+    for x, y in frame_data:
         coins.append(Coin([x, y]))
         coins[-1].draw(screen)
 
@@ -65,7 +64,7 @@ while running:
     frame_index += 1
 
     # Check if we've reached the end of the simulation
-    if frame_index >= len(df):
+    if frame_index >= len(positions):
         running = False
 
     # Cap the frame rate
@@ -0,0 +1,41 @@
+import argparse
+import time
+import numpy as np
+from carrom_engine import create_board
+
+
+# Per-frame cost of Board.step with the spatial-hash broad phase against the
+# all-pairs version on the 400x400 board of carrom_4_slowed_create_csv.py.
+# The coin radius shrinks with the coin count so the board keeps the same
+# density as 15 coins of radius 10; otherwise 5000 coins could not fit at all.
+def time_steps(num_coins, broad_phase, steps, seed):
+    radius = 10 * np.sqrt(15 / num_coins)
+    board = create_board(num_coins, 400, 400, radius=radius, speed=0.3 * radius,
+                         broad_phase=broad_phase, seed=seed)
+    board.step()
+    start = time.perf_counter()
+    for _ in range(steps):
+        board.step()
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark coin-coin collision broad phases")
+    parser.add_argument("--coins", type=int, nargs="+", default=[15, 50, 150, 500, 1500, 5000])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--all-pairs-limit", type=int, default=1500, help="skip all-pairs above this many coins")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'coins':>6} {'grid ms/step':>13} {'grid us/coin':>13} {'all ms/step':>12}")
+    for num_coins in args.coins:
+        grid = time_steps(num_coins, "grid", args.steps, args.seed)
+        if num_coins <= args.all_pairs_limit:
+            all_pairs = f"{time_steps(num_coins, 'all', args.steps, args.seed) * 1e3:12.3f}"
+        else:
+            all_pairs = f"{'-':>12}"
+        print(f"{num_coins:>6} {grid * 1e3:13.3f} {grid / num_coins * 1e6:13.3f} {all_pairs}")
+
+
+if __name__ == "__main__":
+    main()
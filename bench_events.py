@@ -0,0 +1,48 @@
+import argparse
+import time
+import numpy as np
+from carrom_engine import create_board
+
+
+# Deepest coin-coin overlap in a frame; beyond one radius coins have started to pass through each other
+def max_overlap(board):
+    delta = board.pos[:, None, :] - board.pos[None, :, :]
+    dist = np.hypot(delta[..., 0], delta[..., 1])
+    reach = board.radius[:, None] + board.radius[None, :]
+    np.fill_diagonal(dist, np.inf)
+    return max((reach - dist).max(), 0)
+
+
+# The fixed-step solver with and without the max_movement clamp of carrom_3 / carrom_4
+# against the event-driven solver on the same fast shot. With cor=1 the kinetic energy
+# must be conserved; the clamp loses it, large unclamped steps overlap and tunnel.
+def simulate(solver, speed, frames, seed):
+    max_movement = 0.75 if solver == "step clamped" else None
+    board = create_board(15, 400, 400, speed=speed, max_movement=max_movement, seed=seed,
+                         event_driven=solver == "event")
+    energy = (board.vel ** 2).sum()
+    overlap = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        board.step()
+        overlap = max(overlap, max_overlap(board))
+    elapsed = time.perf_counter() - start
+    return elapsed, (board.vel ** 2).sum() / energy, overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the event-driven collision solver")
+    parser.add_argument("--speeds", type=float, nargs="+", default=[3, 10, 30])
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'solver':>13} {'speed':>6} {'ms/frame':>9} {'energy':>7} {'max overlap px':>15}")
+    for speed in args.speeds:
+        for solver in ("step clamped", "step", "event"):
+            elapsed, energy, overlap = simulate(solver, speed, args.frames, args.seed)
+            print(f"{solver:>13} {speed:6g} {elapsed / args.frames * 1e3:9.3f} {energy:7.3f} {overlap:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import pygame
 import sys
-import math
+from carrom_engine import Board, corner_pockets
 
 # Initialize Pygame
 pygame.init()
@@ -19,60 +19,14 @@ green = (0, 255, 0)
 yellow = (255, 255, 0)
 skin = (222,198,174)
 
-# Coin class
-class Coin:
-    def __init__(self, color, pos, vel, radius=20):
-        self.color = color
-        self.pos = pos
-        self.vel = vel
-        self.radius = radius
-
-    def move(self):
-        self.pos[0] += self.vel[0]
-        self.pos[1] += self.vel[1]
-
-    def apply_deceleration(self, deceleration_rate=0.99):
-        self.vel[0] *= deceleration_rate
-        self.vel[1] *= deceleration_rate
-
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.pos[0]), int(self.pos[1])), self.radius)
-
-    def handle_wall_collision(self, width, height):
-        if self.pos[0] - self.radius <= 0 or self.pos[0] + self.radius >= width:
-            self.vel[0] = -self.vel[0]  # Reverse x velocity
-        if self.pos[1] - self.radius <= 0 or self.pos[1] + self.radius >= height:
-            self.vel[1] = -self.vel[1]  # Reverse y velocity
-
-    def handle_coin_collision(self, other):
-        dist = math.hypot(self.pos[0] - other.pos[0], self.pos[1] - other.pos[1])
-        if dist < 2 * self.radius:
-            # Calculate the normal and tangent vectors
-            normal = [(other.pos[0] - self.pos[0]) / dist, (other.pos[1] - self.pos[1]) / dist]
-            tangent = [-normal[1], normal[0]]
-            
-            # Project the velocities onto the normal and tangent vectors
-            self_normal = normal[0] * self.vel[0] + normal[1] * self.vel[1]
-            self_tangent = tangent[0] * self.vel[0] + tangent[1] * self.vel[1]
-            other_normal = normal[0] * other.vel[0] + normal[1] * other.vel[1]
-            other_tangent = tangent[0] * other.vel[0] + tangent[1] * other.vel[1]
-            
-            # Swap the normal components of the velocities
-            new_self_normal = other_normal
-            new_other_normal = self_normal
-            
-            # Convert the scalar normal and tangent velocities into vectors
-            self.vel[0] = new_self_normal * normal[0] + self_tangent * tangent[0]
-            self.vel[1] = new_self_normal * normal[1] + self_tangent * tangent[1]
-            other.vel[0] = new_other_normal * normal[0] + other_tangent * tangent[0]
-            other.vel[1] = new_other_normal * normal[1] + other_tangent * tangent[1]
-
 # Create coins
-coins = [
-    Coin(red, [width // 3, height // 2], [5, -3]),
-    Coin(blue, [2 * width // 3, height // 2], [-5, 3]),
- Coin(yellow, [width // 2, height // 3], [4, 4])
- ]
+colors = [red, blue, yellow]
+board = Board(
+    [[width // 3, height // 2], [2 * width // 3, height // 2], [width // 2, height // 3]],
+    [[5, -3], [-5, 3], [4, 4]],
+    radius=20, width=width, height=height,
+    friction=0.02, sleep_speed=0.05, pockets=corner_pockets(width, height), pocket_radius=30
+)
 
 # Function to draw the carrom board
 def draw_carrom_board(screen):
@@ -108,21 +62,16 @@ while running:
             running = False
 
     # Move coins
-    for coin in coins:
-        coin.move()
+    board.move()
 
     # Handle collisions with walls
-    for coin in coins:
-        coin.handle_wall_collision(width, height)
+    board.handle_wall_collision()
 
     # Handle collisions between coins
-    for i in range(len(coins)):
-        for j in range(i + 1, len(coins)):
-            coins[i].handle_coin_collision(coins[j])
+    board.handle_coin_collision()
 
-    # Apply deceleration
-    #for coin in coins:
-        #coin.apply_deceleration()
+    # Apply friction, capture pocketed coins and put resting coins to sleep
+    board.settle()
 
     # Clear the screen
     screen.fill(skin)
@@ -131,8 +80,10 @@ while running:
     draw_carrom_board(screen)
 
     # Draw coins
-    for coin in coins:
-        coin.draw(screen)
+    for color, pos, radius, pocketed in zip(colors, board.pos, board.radius, board.pocketed):
+        if pocketed:
+            continue
+        pygame.draw.circle(screen, color, (int(pos[0]), int(pos[1])), int(radius))
 
     # Update the display
     pygame.display.flip()
@@ -1,8 +1,9 @@
+import os
 import pygame
 import sys
-import math
-import pandas as pd
-import random
+from carrom_engine import create_board
+from checkpoint import load_checkpoint, save_checkpoint
+from trajectory_io import TrajectoryWriter
 
 pygame.init()
 width, height = 400, 400
@@ -14,78 +15,6 @@ black = (0, 0, 0)
 skin = (222, 198, 174)
 
 font = pygame.font.SysFont(None, 18)
-class Coin:
-    def __init__(self, pos, vel, radius=10, cor=1):
-        self.color = white
-        self.pos = pos
-        self.vel = vel
-        self.radius = radius
-        self.cor = cor
-
-    def move(self):
-        max_movement = 0.75  # Maximum movement per frame
-        max_movement_x = abs(self.vel[0])
-        max_movement_y = abs(self.vel[1])
-
-        # Scale down the velocity if necessary to limit movement
-        if max_movement_x > max_movement:
-            self.vel[0] = self.vel[0] / max_movement_x * max_movement
-        if max_movement_y > max_movement:
-            self.vel[1] = self.vel[1] / max_movement_y * max_movement
-
-        # Update the position based on the scaled velocity
-        self.pos[0] += self.vel[0]
-        self.pos[1] += self.vel[1]
-
-    def apply_deceleration(self, deceleration_rate=0.99):
-        self.vel[0] *= deceleration_rate
-        self.vel[1] *= deceleration_rate
-
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.pos[0]), int(self.pos[1])), self.radius)
-
-    def handle_wall_collision(self, width, height):
-        if self.pos[0] - self.radius <= 0 or self.pos[0] + self.radius >= width:
-            self.vel[0] = -self.vel[0]
-        if self.pos[1] - self.radius <= 0 or self.pos[1] + self.radius >= height:
-            self.vel[1] = -self.vel[1]
-
-    def handle_coin_collision(self, other):
-        dist = math.hypot(self.pos[0] - other.pos[0], self.pos[1] - other.pos[1])
-        if dist < 2 * self.radius:
-            # Normal and tangent vectors
-            normal = [(other.pos[0] - self.pos[0]) / dist, (other.pos[1] - self.pos[1]) / dist]
-
-            # Initial normal velocities
-            self_normal_velocity = normal[0] * self.vel[0] + normal[1] * self.vel[1]
-            other_normal_velocity = normal[0] * other.vel[0] + normal[1] * other.vel[1]
-
-            # New velocities with COR
-            new_self_normal_velocity = (self_normal_velocity * (1 - self.cor) + other_normal_velocity * (1 + self.cor)) / 2
-            new_other_normal_velocity = (self_normal_velocity * (1 + self.cor) + other_normal_velocity * (1 - self.cor)) / 2
-
-            # Update velocities
-            self.vel[0] += (new_self_normal_velocity - self_normal_velocity) * normal[0]
-            self.vel[1] += (new_self_normal_velocity - self_normal_velocity) * normal[1]
-            other.vel[0] += (new_other_normal_velocity - other_normal_velocity) * normal[0]
-            other.vel[1] += (new_other_normal_velocity - other_normal_velocity) * normal[1]
-
-# Create coins with random initial velocities
-def create_coins(num_coins, screen_width, screen_height):
-    coins = []
-    for i in range(num_coins):
-        while True:
-            pos = [random.randint(20, screen_width - 20), random.randint(20, screen_height - 20)]
-            overlap = False
-            for coin in coins:
-                if math.hypot(pos[0] - coin.pos[0], pos[1] - coin.pos[1]) < 2 * coin.radius:
-                    overlap = True
-                    break
-            if not overlap:
-                break
-        vel = [random.uniform(-3, 3), random.uniform(-3, 3)]
-        coins.append(Coin(pos, vel))
-    return coins
 
 # Draw the carrom board
 def draw_carrom_board(screen, width, height):
@@ -95,37 +24,33 @@ def draw_carrom_board(screen, width, height):
 clock = pygame.time.Clock()
 running = True
 num_coins = 15
-coins = create_coins(num_coins, width, height)
 
-# Initialize a list to store coin positions for each frame
-frame_data = []
-frames=0
+# The board is saved every checkpoint_every frames; if the last run was interrupted
+# (crash, kill, preemption) it continues from its latest checkpoint instead of starting over
+checkpoint = "coin_positions.ckpt.npz"
+checkpoint_every = 10000
+if os.path.exists(checkpoint):
+    board, frames, _, _ = load_checkpoint(checkpoint)
+    print(f"Resuming from frame {frames}")
+else:
+    board = create_board(num_coins, width, height, max_movement=0.75)
+    frames = 0
+
+# Stream coin positions for each frame to disk; the file is finalized on 'q',
+# on closing the window, on Ctrl+C and on SIGTERM
+writer = TrajectoryWriter("coin_positions.npz", board.pos.shape, fps=60,
+                          board_size=(width, height), radius=board.radius,
+                          resume_frames=frames or None).finalize_on_exit()
 while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_q:
-                # Create a DataFrame from the collected data
-                df = pd.DataFrame(frame_data, columns=[f"Coin {i}" for i in range(num_coins)])
-
-                # Save the DataFrame to a CSV file
-                df.to_csv("coin_positions.csv", index=True)
-
                 running = False
 
-    # Move coins
-    for coin in coins:
-        coin.move()
-
-    # Handle wall collisions
-    for coin in coins:
-        coin.handle_wall_collision(width, height)
-
-    # Handle coin collisions
-    for i in range(len(coins)):
-        for j in range(i + 1, len(coins)):
-            coins[i].handle_coin_collision(coins[j])
+    # Move coins, handle wall and coin collisions
+    board.step()
 
     # Clear the screen
     screen.fill(skin)
@@ -134,18 +59,16 @@ while running:
     draw_carrom_board(screen, width, height)
 
     # Collect coin positions for the current frame
-    frame_positions = []
-    for coin in coins:
-        tem=coin.pos.copy()
-        frame_positions.append(("--".join(str(x) for x in tem)))
-
-    frame_data.append(frame_positions)
+    writer.append(board.pos)
     frames+=1
     print(f"\rNo of frames: {frames}",end='')
+    if frames % checkpoint_every == 0:
+        writer.flush()
+        save_checkpoint(checkpoint, board, frames)
 
     # Draw coins
-    for coin in coins:
-        coin.draw(screen)
+    for pos, radius in zip(board.pos, board.radius):
+        pygame.draw.circle(screen, white, (int(pos[0]), int(pos[1])), int(radius))
 
     # Update the display
     pygame.display.flip()
@@ -153,5 +76,9 @@ while running:
     # Cap the frame rate
     clock.tick(600000)
 
+writer.close()
+# Quitting normally ends the run; the next start begins a new simulation
+if os.path.exists(checkpoint):
+    os.remove(checkpoint)
 pygame.quit()
 sys.exit()
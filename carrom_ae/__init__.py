@@ -0,0 +1,8 @@
+from .data import WindowDataset
+from .model import AutoencoderLSTM, Decoder, Encoder, load_model
+from .rollout import rollout
+from .train import select_device
+from .runtime import InferenceRuntime
+from .quantize import accuracy_report, quantize_model
+from .physics_loss import PhysicsInformedLoss
+from .hybrid import HybridSimulator
@@ -0,0 +1,21 @@
+import argparse
+from . import bench_horizon, bench_train, export, hybrid, predict, quantize, runtime, train
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m carrom_ae")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train.add_parser(commands)
+    export.add_parser(commands)
+    runtime.add_parser(commands)
+    quantize.add_parser(commands)
+    bench_train.add_parser(commands)
+    bench_horizon.add_parser(commands)
+    hybrid.add_parser(commands)
+    predict.add_parser(commands)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
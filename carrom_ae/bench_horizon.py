@@ -0,0 +1,71 @@
+import time
+import torch
+import torch.optim as optim
+from .bench_train import synthetic_positions
+from .data import WindowDataset
+from .model import AutoencoderLSTM
+from .physics_loss import PhysicsInformedLoss
+from .rollout import rollout
+from .train import make_loader, teacher_forcing_schedule, train_epoch
+
+# (name, frames unrolled per window, final teacher forcing)
+CONFIGS = (
+    ("1-step", 1, 1.0),
+    ("4-step teacher forced", 4, 1.0),
+    ("4-step scheduled", 4, 0.0),
+    ("16-step scheduled", 16, 0.0),
+)
+
+
+def train_config(positions, rollout_steps, min_teacher_forcing, epochs, batch_size, lr, seed):
+    torch.manual_seed(seed)
+    dataset = WindowDataset(positions, 5, rollout_steps)
+    model = AutoencoderLSTM(input_dim=dataset.trajectories[0].shape[1], latent_dim=64, sequence_length=5)
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    loader = make_loader(dataset, batch_size, shuffle=True, seed=seed)
+    criterion = PhysicsInformedLoss()
+    for epoch in range(epochs):
+        teacher_forcing = teacher_forcing_schedule(epoch, epochs, min_teacher_forcing)
+        train_epoch(model, loader, criterion, optimizer, torch.device("cpu"), target="next",
+                    teacher_forcing=teacher_forcing)
+    return model
+
+
+# Position MSE against the true frames of a held-out game, after h autoregressive steps
+def horizon_errors(model, positions, horizons, num_windows):
+    dataset = WindowDataset(positions, 5, max(horizons))
+    indices = torch.linspace(0, len(dataset) - 1, num_windows).long().tolist()
+    windows = torch.stack([dataset[index][0] for index in indices])
+    truth = torch.stack([dataset[index][1] for index in indices])
+    predictions = rollout(model, windows, max(horizons), stateful=False).reshape(truth.shape)
+    return {horizon: (predictions[:, horizon - 1] - truth[:, horizon - 1]).pow(2).mean().item()
+            for horizon in horizons}
+
+
+def main(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    train_positions = synthetic_positions(args.frames, seed=args.seed)
+    test_positions = synthetic_positions(args.frames // 4, seed=args.seed + 1)
+
+    print(f"{'training':>22} {'train s':>8} " + " ".join(f"{'h=' + str(h):>10}" for h in args.horizons))
+    for name, rollout_steps, min_teacher_forcing in CONFIGS:
+        start = time.perf_counter()
+        model = train_config(train_positions, rollout_steps, min_teacher_forcing, args.epochs,
+                             args.batch_size, args.lr, args.seed)
+        elapsed = time.perf_counter() - start
+        errors = horizon_errors(model, test_positions, args.horizons, args.windows)
+        print(f"{name:>22} {elapsed:8.1f} " + " ".join(f"{errors[h]:10.3f}" for h in args.horizons))
+
+
+def add_parser(commands):
+    parser = commands.add_parser("bench-horizon", help="rollout error vs horizon for 1-step and multi-step training")
+    parser.add_argument("--frames", type=int, default=20000, help="length of the synthetic training game")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--windows", type=int, default=64, help="held-out starting windows")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.set_defaults(func=main)
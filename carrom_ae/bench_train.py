@@ -0,0 +1,76 @@
+import time
+import numpy as np
+import torch
+import torch.optim as optim
+from carrom_engine import create_board
+from carrom_headless import run
+from .data import WindowDataset
+from .model import AutoencoderLSTM
+from .physics_loss import PhysicsInformedLoss
+from .train import make_loader, scaled_lr, train_epoch
+
+# (name, batch size, torch.compile, bfloat16 autocast)
+MODES = (
+    ("eager fp32", 32, False, False),
+    ("eager bf16", 32, False, True),
+    ("compile fp32", 32, True, False),
+    ("compile bf16", 32, True, True),
+    ("eager fp32 large-batch", 512, False, False),
+    ("compile bf16 large-batch", 512, True, True),
+)
+
+
+# Fixed synthetic dataset: one seeded 3-coin game from the physics engine
+def synthetic_positions(num_frames, num_coins=3, seed=0):
+    board = create_board(num_coins, 400, 400, max_movement=0.75, seed=seed)
+    return np.concatenate([chunk.astype(np.float32) for chunk in run(board, num_frames)])
+
+
+def benchmark_mode(dataset, batch_size, compile_model, bf16, epochs, lr, lr_scaling, seed):
+    torch.manual_seed(seed)
+    model = AutoencoderLSTM(input_dim=dataset.trajectories[0].shape[1], latent_dim=64,
+                            sequence_length=dataset.sequence_length)
+    train_model = torch.compile(model) if compile_model else model
+    optimizer = optim.Adam(model.parameters(), lr=scaled_lr(lr, batch_size, 32, lr_scaling))
+    loader = make_loader(dataset, batch_size, shuffle=True, seed=seed)
+    device = torch.device("cpu")
+    autocast_dtype = torch.bfloat16 if bf16 else None
+    criterion = PhysicsInformedLoss()
+
+    # The first epoch includes compilation, so it is timed separately
+    start = time.perf_counter()
+    loss = train_epoch(train_model, loader, criterion, optimizer, device, autocast_dtype)
+    first_epoch = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(epochs - 1):
+        loss = train_epoch(train_model, loader, criterion, optimizer, device, autocast_dtype)
+    elapsed = time.perf_counter() - start
+    samples_per_sec = len(dataset) * (epochs - 1) / elapsed if epochs > 1 else len(dataset) / first_epoch
+    return samples_per_sec, first_epoch, loss
+
+
+def main(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    dataset = WindowDataset(synthetic_positions(args.frames, seed=args.seed), 5)
+    print(f"{len(dataset)} windows, {args.epochs} epochs, {torch.get_num_threads()} threads")
+    print(f"{'mode':>26} {'samples/s':>10} {'1st epoch s':>12} {'final loss':>12}")
+    for name, batch_size, compile_model, bf16 in MODES:
+        try:
+            samples_per_sec, first_epoch, loss = benchmark_mode(
+                dataset, batch_size, compile_model, bf16, args.epochs, args.lr, args.lr_scaling, args.seed)
+        except Exception as error:
+            print(f"{name:>26} failed: {type(error).__name__}: {error}")
+            continue
+        print(f"{name:>26} {samples_per_sec:10.0f} {first_epoch:12.2f} {loss:12.4f}")
+
+
+def add_parser(commands):
+    parser = commands.add_parser("bench-train", help="compare eager/compile, fp32/bf16 and large-batch training")
+    parser.add_argument("--frames", type=int, default=20000, help="length of the synthetic trajectory")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--lr", type=float, default=0.001, help="learning rate at batch size 32")
+    parser.add_argument("--lr-scaling", choices=("linear", "sqrt", "none"), default="sqrt")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.set_defaults(func=main)
@@ -0,0 +1,70 @@
+import bisect
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset
+
+
+def _as_frames(trajectory):
+    if isinstance(trajectory, np.ndarray):
+        trajectory = torch.from_numpy(trajectory)
+    # (frames, coins, 2) -> (frames, coins * 2); a view for contiguous data
+    return trajectory.reshape(trajectory.shape[0], -1)
+
+
+# Zero-pad (batch, ..., coins * 2) frames to max_coins coins for a masked model; returns
+# the padded frames and the (batch, max_coins) mask of the real coins
+def pad_coins(frames, max_coins):
+    num_coins = frames.shape[-1] // 2
+    if num_coins > max_coins:
+        raise ValueError(f"{num_coins} coins, the model handles at most {max_coins}")
+    mask = (torch.arange(max_coins, device=frames.device) < num_coins).expand(frames.shape[0], max_coins)
+    return F.pad(frames, (0, 2 * (max_coins - num_coins))), mask
+
+
+# Sliding windows of sequence_length frames plus the frame that follows each window
+# (horizon=1), or the next horizon frames as (horizon, features) for multi-step training.
+# With max_coins set, trajectories may have different coin counts: every item is
+# zero-padded to max_coins and comes with a (max_coins,) mask of the real coins.
+# Windows are views into the trajectories, so memory stays O(frames) instead of the
+# O(frames * sequence_length) of stacking every window up front, and no window ever
+# crosses from one trajectory into the next.
+class WindowDataset(Dataset):
+    def __init__(self, trajectories, sequence_length, horizon=1, max_coins=None):
+        if isinstance(trajectories, (np.ndarray, torch.Tensor)) and trajectories.ndim != 4:
+            trajectories = [trajectories]
+        self.trajectories = [_as_frames(trajectory) for trajectory in trajectories]
+        self.sequence_length = sequence_length
+        self.horizon = horizon
+        self.max_coins = max_coins
+        counts = [max(len(trajectory) - sequence_length - horizon + 1, 0) for trajectory in self.trajectories]
+        self.offsets = np.cumsum([0] + counts).tolist()
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def locate(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        trajectory = bisect.bisect_right(self.offsets, index) - 1
+        return trajectory, index - self.offsets[trajectory]
+
+    def __getitem__(self, index):
+        trajectory, start = self.locate(index)
+        frames = self.trajectories[trajectory]
+        end = start + self.sequence_length
+        window = frames[start:end]
+        future = frames[end] if self.horizon == 1 else frames[end:end + self.horizon]
+        if self.max_coins is None:
+            return window, future
+        num_coins = frames.shape[1] // 2
+        padding = (0, 2 * (self.max_coins - num_coins))
+        mask = torch.arange(self.max_coins) < num_coins
+        return F.pad(window, padding), F.pad(future, padding), mask
+
+    # Every window of one trajectory as a single strided (windows, sequence_length, features) view
+    def windows(self, trajectory=0):
+        frames = self.trajectories[trajectory]
+        return frames[:len(frames) - self.horizon].unfold(0, self.sequence_length, 1).transpose(1, 2)
@@ -0,0 +1,44 @@
+import os
+import torch
+from .model import load_model
+
+
+def example_input(model, batch_size=1, sequence_length=5):
+    return torch.zeros(batch_size, sequence_length, model.decoder.fc2.out_features)
+
+
+# TorchScript via tracing: forward has no data-dependent control flow, and the
+# traced graph keeps the batch size dynamic because forward reads it from x.size()
+def export_torchscript(model, path, sequence_length=5):
+    model.eval()
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example_input(model, 2, sequence_length))
+    scripted.save(path)
+    return path
+
+
+def export_onnx(model, path, sequence_length=5):
+    model.eval()
+    torch.onnx.export(model, (example_input(model, 2, sequence_length),), path,
+                      input_names=["window"], output_names=["next_frame"],
+                      dynamic_axes={"window": {0: "batch"}, "next_frame": {0: "batch"}})
+    return path
+
+
+def main(args):
+    model = load_model(args.weights, args.sequence_length)
+    os.makedirs(args.out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.weights))[0]
+    if args.format in ("torchscript", "all"):
+        print("TorchScript:", export_torchscript(model, os.path.join(args.out_dir, stem + ".pt"), args.sequence_length))
+    if args.format in ("onnx", "all"):
+        print("ONNX:", export_onnx(model, os.path.join(args.out_dir, stem + ".onnx"), args.sequence_length))
+
+
+def add_parser(commands):
+    parser = commands.add_parser("export", help="export trained weights to TorchScript and/or ONNX")
+    parser.add_argument("--weights", default="model_weights.pth")
+    parser.add_argument("--out-dir", default="exported")
+    parser.add_argument("--format", choices=("torchscript", "onnx", "all"), default="all")
+    parser.add_argument("--sequence-length", type=int, default=5)
+    parser.set_defaults(func=main)
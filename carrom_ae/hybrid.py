@@ -0,0 +1,157 @@
+import time
+import numpy as np
+import torch
+from carrom_engine import BoardBatch, create_batch
+from carrom_headless import run
+from .model import load_model
+
+
+# Boards on which some coin is within margin of touching another coin or a wall,
+# for positions of shape (boards, coins, 2) and radius of shape (boards, coins)
+def near_contact(pos, radius, width, height, margin):
+    delta = pos[:, :, None, :] - pos[:, None, :, :]
+    dist = np.hypot(delta[..., 0], delta[..., 1])
+    reach = radius[:, :, None] + radius[:, None, :] + margin
+    touching = (dist < reach) & ~np.eye(pos.shape[1], dtype=bool)
+    r = radius[..., None] + margin
+    size = np.array([width, height], dtype=np.float64)
+    walls = (pos - r <= 0) | (pos + r >= size)
+    return touching.any(axis=(1, 2)) | walls.any(axis=(1, 2))
+
+
+# Advances a BoardBatch with the surrogate model while a board is quiet and with the
+# exact engine physics (Board.handle_wall_collision / handle_coin_collision) whenever its
+# coins are, or are predicted to be, within threshold of a contact. Every frame, whichever
+# way it was produced, goes into the model's input window, so the surrogate resumes from
+# the true post-contact state. Surrogate boards get vel = predicted - pos so the engine can
+# take over at any frame. Has the pos / vel / step() of a board, so carrom_headless.run works.
+# Predictions that move a coin further than max_step in one frame are rejected as well;
+# by default that is the fastest move the engine's max_movement clamp allows.
+class HybridSimulator:
+    def __init__(self, model, batch, sequence_length=5, threshold=2.0, max_step=None):
+        self.model = model.eval()
+        self.batch = batch
+        self.sequence_length = sequence_length
+        self.threshold = threshold
+        if max_step is None and batch.max_movement is not None:
+            max_step = np.hypot(batch.max_movement, batch.max_movement)
+        self.max_step = max_step
+        self.history = torch.empty(len(batch), sequence_length, batch.num_coins * 2)
+        self.filled = 0
+        self.surrogate_steps = 0
+        self.physics_steps = 0
+
+    @property
+    def pos(self):
+        return self.batch.pos
+
+    @property
+    def vel(self):
+        return self.batch.vel
+
+    def apply_deceleration(self, deceleration_rate=0.99):
+        self.batch.apply_deceleration(deceleration_rate)
+
+    def _record(self):
+        frame = torch.from_numpy(self.batch.pos.reshape(len(self.batch), -1)).float()
+        self.history = torch.cat([self.history[:, 1:], frame.unsqueeze(1)], dim=1)
+        self.filled = min(self.filled + 1, self.sequence_length)
+
+    # Exact physics for the selected boards only
+    def _physics_step(self, boards):
+        batch = self.batch
+        if len(boards) == len(batch):
+            batch.step()
+        else:
+            sub = BoardBatch(batch.pos[boards], batch.vel[boards], batch.radius[boards], batch.cor[boards],
+                             batch.width, batch.height, batch.max_movement)
+            sub.step()
+            batch.pos[boards] = sub.pos
+            batch.vel[boards] = sub.vel
+        self.physics_steps += len(boards)
+
+    # The surrogate predicts whole frames of the rate it was trained on, so dt is fixed at 1
+    @torch.no_grad()
+    def step(self, dt=1.0):
+        if dt != 1:
+            raise ValueError("HybridSimulator only steps whole frames (dt=1)")
+        batch = self.batch
+        # The window has to be filled with real frames before the surrogate can predict
+        if self.filled < self.sequence_length:
+            self._physics_step(np.arange(len(batch)))
+            self._record()
+            return
+        physics = near_contact(batch.pos, batch.radius, batch.width, batch.height, self.threshold)
+        quiet = np.flatnonzero(~physics)
+        if len(quiet):
+            predicted = self.model(self.history[quiet]).double().numpy().reshape(len(quiet), -1, 2)
+            contact = near_contact(predicted, batch.radius[quiet], batch.width, batch.height, self.threshold)
+            if self.max_step is not None:
+                moved = predicted - batch.pos[quiet]
+                contact |= np.hypot(moved[..., 0], moved[..., 1]).max(axis=1) > self.max_step
+            physics[quiet[contact]] = True
+            quiet, predicted = quiet[~contact], predicted[~contact]
+            batch.vel[quiet] = predicted - batch.pos[quiet]
+            batch.pos[quiet] = predicted
+            self.surrogate_steps += len(quiet)
+        if physics.any():
+            self._physics_step(np.flatnonzero(physics))
+        self._record()
+
+
+def _simulate(board, steps):
+    start = time.perf_counter()
+    positions = np.concatenate([chunk.copy() for chunk in run(board, steps)])
+    return positions, time.perf_counter() - start
+
+
+# Accuracy and speed of the hybrid simulator against pure engine physics on the same boards
+def main(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.weights:
+        model = load_model(args.weights, args.sequence_length)
+    else:
+        # Only the benchmark needs the benchmark helpers, so HybridSimulator does not import them
+        from .bench_horizon import train_config
+        from .bench_train import synthetic_positions
+        print(f"No --weights, training a {args.coins}-coin model for {args.epochs} epochs")
+        positions = synthetic_positions(args.frames, args.coins, seed=args.seed)
+        model = train_config(positions, 4, 0.0, args.epochs, 64, 0.001, args.seed)
+    num_coins = model.decoder.fc2.out_features // 2
+
+    def new_batch():
+        return create_batch(args.boards, num_coins, 400, 400, max_movement=0.75, seed=args.seed)
+
+    physics, physics_time = _simulate(new_batch(), args.steps)
+    hybrid = HybridSimulator(model, new_batch(), args.sequence_length, args.threshold, args.max_step)
+    predicted, hybrid_time = _simulate(hybrid, args.steps)
+
+    error = np.hypot(*(predicted - physics).transpose(3, 0, 1, 2))
+    board_steps = hybrid.surrogate_steps + hybrid.physics_steps
+    print(f"{args.boards} boards x {num_coins} coins x {args.steps} frames, threshold {args.threshold} px")
+    print(f"physics: {physics_time:.2f} s")
+    print(f"hybrid:  {hybrid_time:.2f} s ({physics_time / hybrid_time:.2f}x), "
+          f"{hybrid.surrogate_steps / board_steps:.1%} of board steps on the surrogate")
+    for horizon in args.horizons:
+        if horizon <= args.steps:
+            frame = error[horizon - 1]
+            print(f"frame {horizon:>6}: mean error {frame.mean():8.3f} px, max {frame.max():8.3f} px")
+
+
+def add_parser(commands):
+    parser = commands.add_parser("bench-hybrid", help="hybrid surrogate/physics simulator vs pure physics")
+    parser.add_argument("--weights", default=None, help="trained state_dict; a small model is trained if omitted")
+    parser.add_argument("--boards", type=int, default=64)
+    parser.add_argument("--coins", type=int, default=3, help="coins per board for the model trained without --weights")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=2.0, help="contact margin in pixels that hands off to physics")
+    parser.add_argument("--max-step", type=float, default=None,
+                        help="reject predictions moving a coin further per frame (default: the max_movement limit)")
+    parser.add_argument("--sequence-length", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=20000, help="training frames without --weights")
+    parser.add_argument("--epochs", type=int, default=5, help="training epochs without --weights")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[10, 100, 1000, 2000])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.set_defaults(func=main)
@@ -0,0 +1,99 @@
+import torch
+import torch.nn as nn
+
+
+class Encoder(nn.Module):
+    def __init__(self, input_dim, latent_dim):
+        super(Encoder, self).__init__()
+        self.fc1 = nn.Linear(input_dim, 64)
+        self.fc2 = nn.Linear(64, latent_dim)
+
+    def forward(self, x):
+        x = torch.relu(self.fc1(x))
+        x = torch.relu(self.fc2(x))
+        return x
+
+class Decoder(nn.Module):
+    def __init__(self, latent_dim, output_dim):
+        super(Decoder, self).__init__()
+        self.fc1 = nn.Linear(latent_dim, 64)
+        self.fc2 = nn.Linear(64, output_dim)
+
+    def forward(self, x):
+        x = torch.relu(self.fc1(x))
+        x = self.fc2(x)
+        return x
+
+class AutoencoderLSTM(nn.Module):
+    # masked=True handles boards with fewer coins than input_dim // 2: inputs are
+    # zero-padded and a per-coin validity mask is appended to every encoded frame
+    def __init__(self, input_dim, latent_dim, sequence_length, masked=False):
+        super(AutoencoderLSTM, self).__init__()
+        self.masked = masked
+        encoder_dim = input_dim + input_dim // 2 if masked else input_dim
+        self.encoder = Encoder(encoder_dim, latent_dim)
+        self.lstm = nn.LSTM(latent_dim, latent_dim, batch_first=True)
+        self.decoder = Decoder(latent_dim, input_dim)
+
+    # mask: (batch, coins), 1 for real coins and 0 for padding; padded slots predict 0
+    def _with_mask(self, x, mask):
+        if not self.masked:
+            return x
+        if mask is None:
+            mask = x.new_ones(x.shape[0], x.shape[-1] // 2)
+        mask = mask.to(x.dtype)
+        if x.dim() == 3:
+            return torch.cat([x, mask.unsqueeze(1).expand(-1, x.shape[1], -1)], dim=-1)
+        return torch.cat([x, mask], dim=-1)
+
+    def _masked_output(self, decoded, mask):
+        if not self.masked or mask is None:
+            return decoded
+        return decoded * mask.to(decoded.dtype).repeat_interleave(2, dim=-1)
+
+    def forward(self, x, mask=None):
+        x = self._with_mask(x, mask)
+        batch_size, seq_len, input_dim = x.size()
+        x = x.view(batch_size * seq_len, input_dim)  # Flatten for encoding
+        encoded = self.encoder(x)  # Encode each frame
+        encoded = encoded.view(batch_size, seq_len, -1)  # Reshape for LSTM
+        lstm_out, _ = self.lstm(encoded)  # Process with LSTM
+        decoded = self.decoder(lstm_out[:, -1, :])  # Decode only last step
+        return self._masked_output(decoded, mask)
+
+    # Streaming inference: start() runs the warm-up window once and returns the first
+    # prediction with the LSTM (h, c) state, each (batch, latent_dim); every step() then
+    # encodes just one new frame and advances the carried state with a single LSTM cell,
+    # so a step costs the same for any window length.
+    # The carried state summarises the whole history rather than only the last
+    # sequence_length frames, which is what forward() sees.
+    def start(self, x, mask=None):
+        x = self._with_mask(x, mask)
+        batch_size, seq_len, input_dim = x.size()
+        encoded = self.encoder(x.reshape(batch_size * seq_len, input_dim)).view(batch_size, seq_len, -1)
+        lstm_out, (h, c) = self.lstm(encoded)
+        return self._masked_output(self.decoder(lstm_out[:, -1, :]), mask), (h[0], c[0])
+
+    def step(self, frame, state, mask=None):
+        encoded = self.encoder(self._with_mask(frame, mask))
+        lstm = self.lstm
+        if isinstance(lstm, nn.LSTM):
+            h, c = torch.lstm_cell(encoded, state, lstm.weight_ih_l0, lstm.weight_hh_l0,
+                                   lstm.bias_ih_l0, lstm.bias_hh_l0)
+        else:
+            # Quantized LSTMs keep packed weights, so run them as a length-1 sequence
+            h, c = state
+            _, (h, c) = lstm(encoded.unsqueeze(1), (h.unsqueeze(0), c.unsqueeze(0)))
+            h, c = h[0], c[0]
+        return self._masked_output(self.decoder(h), mask), (h, c)
+
+# Rebuild an AutoencoderLSTM from a saved state_dict; the layer sizes are read from the weights
+def load_model(path, sequence_length=5, map_location="cpu"):
+    state_dict = torch.load(path, map_location=map_location)
+    latent_dim = state_dict["encoder.fc2.weight"].shape[0]
+    input_dim = state_dict["decoder.fc2.weight"].shape[0]
+    masked = state_dict["encoder.fc1.weight"].shape[1] != input_dim
+    model = AutoencoderLSTM(input_dim=input_dim, latent_dim=latent_dim, sequence_length=sequence_length,
+                            masked=masked)
+    model.load_state_dict(state_dict)
+    return model.eval()
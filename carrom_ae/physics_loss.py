@@ -0,0 +1,94 @@
+import torch
+import torch.nn as nn
+
+
+def _coins(frames):
+    # (..., coins * 2) -> (..., coins, 2)
+    return frames.reshape(*frames.shape[:-1], -1, 2)
+
+
+# Mean of values over the entries the mask keeps; a plain mean without a mask
+def _masked_mean(values, mask=None):
+    if mask is None:
+        return values.mean()
+    mask = mask.to(values.dtype).expand_as(values)
+    return (values * mask).sum() / mask.sum().clamp(min=1)
+
+
+def _coin_mask(mask):
+    # (batch, coins) validity mask of padded boards -> (batch, coins, 2)
+    return None if mask is None else mask.unsqueeze(-1).expand(*mask.shape, 2)
+
+
+def mse(prediction, target, mask=None):
+    return _masked_mean((prediction - target).pow(2), None if mask is None else mask.repeat_interleave(2, dim=-1))
+
+
+# Squared depth by which coin pairs overlap (distance < r_i + r_j), mean over boards and pairs
+def overlap_penalty(frames, radius, mask=None):
+    coins = _coins(frames)
+    num_coins = coins.shape[-2]
+    i, j = torch.triu_indices(num_coins, num_coins, offset=1, device=frames.device)
+    delta = coins[..., j, :] - coins[..., i, :]
+    dist = torch.sqrt(delta.pow(2).sum(-1) + 1e-12)
+    radius = torch.as_tensor(radius, dtype=frames.dtype, device=frames.device).expand(num_coins)
+    pair_mask = None if mask is None else mask[..., i] & mask[..., j]
+    return _masked_mean(torch.relu(radius[i] + radius[j] - dist).pow(2), pair_mask)
+
+
+# Squared depth by which coins cross the board bounds used by the simulators (0..width, 0..height)
+def wall_penalty(frames, radius, board_size, mask=None):
+    coins = _coins(frames)
+    radius = torch.as_tensor(radius, dtype=frames.dtype, device=frames.device).expand(coins.shape[-2]).unsqueeze(-1)
+    size = torch.as_tensor(board_size, dtype=frames.dtype, device=frames.device)
+    depth = torch.relu(radius - coins) + torch.relu(coins + radius - size)
+    return _masked_mean(depth.pow(2), _coin_mask(mask))
+
+
+# Predicted per-coin velocity should continue the last observed one; away from
+# contacts the simulators move coins at constant velocity. Only meaningful when the
+# prediction is the frame after the window (train --target next).
+def velocity_penalty(window, prediction, mask=None):
+    last_velocity = _coins(window[:, -1] - window[:, -2])
+    predicted_velocity = _coins(prediction - window[:, -1])
+    return _masked_mean((predicted_velocity - last_velocity).pow(2), _coin_mask(mask))
+
+
+# Coins have equal mass, so coin-coin collisions conserve the summed velocity of a board.
+# Padded coins repeat zeros and add nothing to the sums.
+def momentum_penalty(window, prediction, mask=None):
+    last_momentum = _coins(window[:, -1] - window[:, -2]).sum(-2)
+    predicted_momentum = _coins(prediction - window[:, -1]).sum(-2)
+    return (predicted_momentum - last_momentum).pow(2).mean()
+
+
+# MSE plus weighted physics terms; a term whose weight is 0 is not computed.
+# The unweighted value of each term of the last call is kept in self.terms for logging.
+class PhysicsInformedLoss(nn.Module):
+    def __init__(self, radius=10, board_size=(400, 400), overlap_weight=0.0, wall_weight=0.0,
+                 velocity_weight=0.0, momentum_weight=0.0):
+        super(PhysicsInformedLoss, self).__init__()
+        self.radius = radius
+        self.board_size = board_size
+        self.overlap_weight = overlap_weight
+        self.wall_weight = wall_weight
+        self.velocity_weight = velocity_weight
+        self.momentum_weight = momentum_weight
+        self.terms = {}
+
+    # mask: optional (batch, coins) validity mask for zero-padded boards
+    def forward(self, output, target, window, mask=None):
+        loss = mse(output, target, mask)
+        self.terms = {"mse": loss.detach()}
+        penalties = (
+            ("overlap", self.overlap_weight, lambda: overlap_penalty(output, self.radius, mask)),
+            ("wall", self.wall_weight, lambda: wall_penalty(output, self.radius, self.board_size, mask)),
+            ("velocity", self.velocity_weight, lambda: velocity_penalty(window, output, mask)),
+            ("momentum", self.momentum_weight, lambda: momentum_penalty(window, output, mask)),
+        )
+        for name, weight, penalty in penalties:
+            if weight:
+                term = penalty()
+                self.terms[name] = term.detach()
+                loss = loss + weight * term
+        return loss
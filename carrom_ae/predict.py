@@ -0,0 +1,79 @@
+import argparse
+import os
+import torch
+from trajectory_io import TrajectoryWriter, load_trajectory
+from .data import pad_coins
+from .model import load_model
+from .rollout import rollout_steps
+
+
+# Written next to the trajectory and renamed into place, so a crash never leaves half a checkpoint
+def save_rollout_checkpoint(path, step, state, args):
+    tmp_path = path + ".tmp"
+    torch.save({"step": step, "state": state, "args": args}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Long rollouts streamed to a trajectory file, with periodic checkpoints of the rollout
+# state and step index; --resume continues from the last checkpoint
+def main(args):
+    start_step = 0
+    state = None
+    if args.resume:
+        checkpoint = torch.load(args.resume)
+        start_step, state = checkpoint["step"], checkpoint["state"]
+        args = argparse.Namespace(**checkpoint["args"])
+        print(f"Resuming {args.output} from step {start_step}")
+    elif args.weights is None or args.data is None:
+        raise SystemExit("give weights and data, or --resume a checkpoint")
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model = load_model(args.weights, args.sequence_length)
+    trajectory = load_trajectory(args.data, mmap=True)
+    positions = trajectory.torch_frames(args.start, args.start + args.sequence_length)
+    # (frames, coins, 2) or (trajectories, frames, coins, 2) -> (trajectories, frames, coins * 2)
+    windows = positions.reshape(-1, args.sequence_length, positions.shape[-2] * 2).float()
+    frame_shape = positions.shape[:-3] + positions.shape[-2:]
+    num_features = windows.shape[-1]
+    # A masked model takes boards of up to its coin count, padded with a mask of the real coins
+    model_coins = model.decoder.fc2.out_features // 2
+    mask = None
+    if model.masked:
+        try:
+            windows, mask = pad_coins(windows, model_coins)
+        except ValueError as error:
+            raise SystemExit(f"{args.data}: {error}")
+    elif positions.shape[-2] != model_coins:
+        raise SystemExit(f"{args.data} has {positions.shape[-2]} coins, the model was trained on {model_coins}")
+
+    writer = TrajectoryWriter(args.output, frame_shape, trajectory.fps, trajectory.board_size, trajectory.radius,
+                              resume_frames=start_step or None)
+    writer.finalize_on_exit()
+    steps = rollout_steps(model.eval(), windows, not args.stateless, mask, state)
+    options = {name: value for name, value in vars(args).items() if name != "func"}
+    for step, (frame, state) in zip(range(start_step, args.steps), steps):
+        writer.append(frame[:, :num_features].reshape(frame_shape).numpy())
+        if args.checkpoint and (step + 1) % args.checkpoint_every == 0 and step + 1 < args.steps:
+            writer.flush()
+            save_rollout_checkpoint(args.checkpoint, step + 1, state, options)
+    writer.close()
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print(f"{writer.num_frames} predicted frames saved to {writer.path}")
+
+
+def add_parser(commands):
+    parser = commands.add_parser("rollout", help="stream a long rollout to a trajectory file, with checkpoints")
+    parser.add_argument("weights", nargs="?", help="trained state_dict")
+    parser.add_argument("data", nargs="?", help="trajectory .npz the warm-up window is taken from")
+    parser.add_argument("--output", default="coin_positions2.npz")
+    parser.add_argument("--steps", type=int, default=500000, help="frames to predict")
+    parser.add_argument("--start", type=int, default=0, help="first frame of the warm-up window")
+    parser.add_argument("--stateless", action="store_true", help="re-run the sliding window instead of carrying the LSTM state")
+    parser.add_argument("--sequence-length", type=int, default=5)
+    parser.add_argument("--checkpoint", default=None, help="save the rollout state to this file while running")
+    parser.add_argument("--checkpoint-every", type=int, default=10000, help="steps between checkpoints")
+    parser.add_argument("--resume", default=None, help="continue from this checkpoint; other options are taken from it")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.set_defaults(func=main)
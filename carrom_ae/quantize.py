@@ -0,0 +1,102 @@
+import copy
+import io
+import time
+import torch
+import torch.nn as nn
+from .export import export_torchscript
+from .model import load_model
+from .rollout import rollout
+from .train import load_windows
+
+
+# int8 weights with activations quantized on the fly: covers the Encoder/Decoder
+# Linear layers and the LSTM, which is the whole network
+def quantize_model(model):
+    model = copy.deepcopy(model).eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+
+
+def model_size(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _timed_rollout(model, windows, num_steps, mask=None):
+    start = time.perf_counter()
+    predictions = rollout(model, windows, num_steps, mask=mask)
+    return predictions, time.perf_counter() - start
+
+
+# Position MSE of the quantized rollout against the float rollout from the same windows,
+# at each horizon, plus measured rollout speedup and serialized model size.
+# mask is the (trajectories, coins) mask of zero-padded windows for a masked model;
+# the padded coins are left out of the error.
+def accuracy_report(model, windows, num_steps, horizons=(1, 10, 100, 1000, 10000), mask=None):
+    quantized = quantize_model(model)
+    float_predictions, float_time = _timed_rollout(model, windows, num_steps, mask)
+    quantized_predictions, quantized_time = _timed_rollout(quantized, windows, num_steps, mask)
+
+    squared_error = (quantized_predictions - float_predictions).pow(2)
+    if mask is None:
+        squared_error = squared_error.mean(dim=(0, 2, 3))
+    else:
+        weights = mask.to(squared_error.dtype)[:, None, :, None]
+        squared_error = (squared_error * weights).sum(dim=(0, 2, 3)) / (2 * weights.sum())
+    drift = {horizon: squared_error[horizon - 1].item() for horizon in horizons if horizon <= num_steps}
+    return {
+        "drift": drift,
+        "mean_mse": squared_error.mean().item(),
+        "float_time": float_time,
+        "quantized_time": quantized_time,
+        "speedup": float_time / quantized_time,
+        "float_size": model_size(model),
+        "quantized_size": model_size(quantized),
+    }
+
+
+def main(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = load_model(args.weights, args.sequence_length)
+    # A masked model takes boards of up to its coin count, padded by the dataset
+    max_coins = model.decoder.fc2.out_features // 2 if model.masked else None
+    try:
+        dataset = load_windows(args.data, args.sequence_length, max_coins=max_coins)
+    except ValueError as error:
+        raise SystemExit(error)
+    num_coins = dataset.trajectories[0].shape[1] // 2
+    if max_coins is None and num_coins != model.decoder.fc2.out_features // 2:
+        raise SystemExit(f"the data has {num_coins} coins, the model was trained on "
+                         f"{model.decoder.fc2.out_features // 2}")
+    # Starting windows spread evenly over the dataset
+    indices = torch.linspace(0, len(dataset) - 1, args.trajectories).long().tolist()
+    windows = torch.stack([dataset[index][0] for index in indices])
+    mask = None if max_coins is None else torch.stack([dataset[index][2] for index in indices])
+
+    report = accuracy_report(model, windows, args.steps, mask=mask)
+    print(f"Rollout of {args.trajectories} trajectories x {args.steps} steps")
+    for horizon, mse in report["drift"].items():
+        print(f"  position MSE vs float at step {horizon:>6}: {mse:.6f}")
+    print(f"  mean position MSE vs float: {report['mean_mse']:.6f}")
+    print(f"  float {report['float_time']:.2f}s, int8 {report['quantized_time']:.2f}s, "
+          f"speedup {report['speedup']:.2f}x")
+    print(f"  size float {report['float_size'] / 1024:.1f} KiB, int8 {report['quantized_size'] / 1024:.1f} KiB, "
+          f"{report['float_size'] / report['quantized_size']:.2f}x smaller")
+
+    if args.output:
+        # TorchScript keeps the packed int8 weights; load it with InferenceRuntime
+        export_torchscript(quantize_model(model), args.output, args.sequence_length)
+        print(f"Quantized model saved to {args.output}")
+
+
+def add_parser(commands):
+    parser = commands.add_parser("quantize", help="dynamic int8 quantization with an accuracy/speed report")
+    parser.add_argument("data", nargs="+", help="trajectory .npz files to draw starting windows from")
+    parser.add_argument("--weights", default="model_weights.pth")
+    parser.add_argument("--sequence-length", type=int, default=5)
+    parser.add_argument("--trajectories", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", default=None, help="save the quantized model as TorchScript, e.g. model_int8.pt")
+    parser.set_defaults(func=main)
@@ -0,0 +1,57 @@
+import torch
+
+
+# Yields (frame, state) for every predicted frame of a batch of windows. state is what
+# a checkpoint needs to continue after that frame: the sliding window for stateful=False,
+# the last frame and the LSTM (h, c) for stateful=True. Passing it back in as state
+# resumes with the frame that follows it.
+@torch.no_grad()
+def rollout_steps(model, window, stateful=True, mask=None, state=None):
+    kwargs = {} if mask is None else {"mask": mask}
+    resumed = state is not None
+    if resumed:
+        window, frame, lstm = state["window"], state["frame"], state["lstm"]
+    elif stateful:
+        frame, lstm = model.start(window, **kwargs)
+    else:
+        frame, lstm = model(window, **kwargs), None
+    while True:
+        if not resumed:
+            yield frame, {"window": None if stateful else window, "frame": frame, "lstm": lstm}
+        resumed = False
+        if stateful:
+            frame, lstm = model.step(frame, lstm, **kwargs)
+        else:
+            window = torch.cat([window[:, 1:], frame.unsqueeze(1)], dim=1)
+            frame = model(window, **kwargs)
+
+
+# Advance many independent starting windows in lockstep as one batch.
+# windows: (trajectories, sequence_length, coins * 2) or (trajectories, sequence_length, coins, 2)
+# Returns the predicted frames as (trajectories, num_steps, coins, 2).
+# stateful=True carries the LSTM state (AutoencoderLSTM.start / step); stateful=False
+# re-runs forward() over a sliding window exactly as the model was trained.
+# batch_size bounds how many trajectories are pushed through the model at once.
+# out may be a preallocated (trajectories, num_steps, coins, 2) tensor, e.g. a
+# torch.from_numpy view of a memory-mapped array, that predictions are written into.
+# mask is the (trajectories, coins) validity mask of zero-padded boards for a masked model.
+@torch.no_grad()
+def rollout(model, windows, num_steps, stateful=True, batch_size=None, out=None, mask=None):
+    num_trajectories, sequence_length = windows.shape[:2]
+    windows = windows.reshape(num_trajectories, sequence_length, -1)
+    num_features = windows.shape[-1]
+    if out is None:
+        out = torch.empty(num_trajectories, num_steps, num_features // 2, 2,
+                          dtype=windows.dtype, device=windows.device)
+    predictions = out.view(num_trajectories, num_steps, num_features)
+    batch_size = batch_size or num_trajectories
+
+    model.eval()
+    for start in range(0, num_trajectories, batch_size):
+        batch = predictions[start:start + batch_size]
+        batch_mask = None if mask is None else mask[start:start + batch_size]
+        steps = rollout_steps(model, windows[start:start + batch_size], stateful, batch_mask)
+        # range comes first so the generator is not advanced past the last step
+        for step, (frame, _) in zip(range(num_steps), steps):
+            batch[:, step] = frame
+    return out
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import time
+import numpy as np
+import torch
+from .export import example_input, export_onnx, export_torchscript
+from .model import load_model
+
+
+# Runs an exported model without the carrom_ae class definitions:
+# ".pt" files are loaded with torch.jit.load, ".onnx" files with ONNX Runtime on CPU
+class InferenceRuntime:
+    def __init__(self, path, threads=None):
+        self.path = path
+        if path.endswith(".onnx"):
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            if threads:
+                options.intra_op_num_threads = threads
+            self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            self.backend = "onnxruntime"
+        else:
+            self.module = torch.jit.load(path, map_location="cpu").eval()
+            self.backend = "torchscript"
+
+    # window: (batch, sequence_length, coins * 2) array or tensor -> (batch, coins * 2) numpy
+    def predict(self, window):
+        if self.backend == "onnxruntime":
+            window = np.asarray(window, dtype=np.float32)
+            return self.session.run(None, {"window": window})[0]
+        with torch.no_grad():
+            return self.module(torch.as_tensor(window, dtype=torch.float32)).numpy()
+
+    # First calls pay for graph optimisation and allocation, keep them out of timings
+    def warmup(self, window, iterations=10):
+        for _ in range(iterations):
+            self.predict(window)
+        return self
+
+
+def _time(predict, window, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        predict(window)
+    return (time.perf_counter() - start) / iterations
+
+
+# Latency at batch 1 and throughput at a large batch for eager, TorchScript and ONNX Runtime
+def benchmark(model, sequence_length=5, batch_size=1024, iterations=200, warmup=20, threads=None):
+    model.eval()
+    single = example_input(model, 1, sequence_length).normal_()
+    batch = example_input(model, batch_size, sequence_length).normal_()
+
+    def eager(window):
+        with torch.no_grad():
+            return model(torch.as_tensor(window)).numpy()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runtimes = {"eager": eager}
+        runtimes["torchscript"] = InferenceRuntime(
+            export_torchscript(model, os.path.join(tmp, "model.pt"), sequence_length)).predict
+        try:
+            runtimes["onnxruntime"] = InferenceRuntime(
+                export_onnx(model, os.path.join(tmp, "model.onnx"), sequence_length), threads).predict
+        except ImportError as error:
+            print(f"Skipping ONNX Runtime: {error}")
+
+        results = {}
+        for name, predict in runtimes.items():
+            for window in (single, batch):
+                for _ in range(warmup):
+                    predict(window)
+            latency = _time(predict, single, iterations)
+            throughput = batch_size / _time(predict, batch, max(iterations // 10, 1))
+            results[name] = (latency, throughput)
+    return results
+
+
+def main(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = load_model(args.weights, args.sequence_length)
+    results = benchmark(model, args.sequence_length, args.batch_size, args.iterations, args.warmup, args.threads)
+    print(f"{'runtime':>12} {'latency (us)':>13} {'frames/s @' + str(args.batch_size):>16}")
+    for name, (latency, throughput) in results.items():
+        print(f"{name:>12} {latency * 1e6:13.1f} {throughput:16.0f}")
+
+
+def add_parser(commands):
+    parser = commands.add_parser("bench-inference", help="compare eager, TorchScript and ONNX Runtime on CPU")
+    parser.add_argument("--weights", default="model_weights.pth")
+    parser.add_argument("--sequence-length", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.set_defaults(func=main)
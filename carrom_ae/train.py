@@ -0,0 +1,190 @@
+import math
+import os
+import torch
+import torch.optim as optim
+from torch.utils.data import DataLoader
+from trajectory_io import load_trajectory
+from .data import WindowDataset
+from .model import AutoencoderLSTM
+from .physics_loss import PhysicsInformedLoss
+
+
+def select_device(name="auto"):
+    if name == "auto":
+        name = "cuda" if torch.cuda.is_available() else "cpu"
+    return torch.device(name)
+
+
+# Every trajectory of every file becomes its own run of windows; files stay memory-mapped.
+# The board size and coin radii of the first file are kept for the physics loss terms.
+# max_coins pads every board to that many coins, so files with different coin counts mix;
+# without it every trajectory must have the same number of coins.
+def load_windows(paths, sequence_length, horizon=1, max_coins=None):
+    trajectories = []
+    first = None
+    for path in paths:
+        trajectory = load_trajectory(path, mmap=True)
+        first = first or trajectory
+        if trajectory.positions.ndim == 4:
+            trajectories.extend(trajectory.positions)
+        else:
+            trajectories.append(trajectory.positions)
+    coin_counts = sorted({trajectory.shape[-2] for trajectory in trajectories})
+    if max_coins is None and len(coin_counts) > 1:
+        raise ValueError(f"trajectories have {coin_counts} coins; pad them with --max-coins {coin_counts[-1]}")
+    if max_coins is not None and coin_counts[-1] > max_coins:
+        raise ValueError(f"trajectories have up to {coin_counts[-1]} coins, boards are padded to only {max_coins}")
+    dataset = WindowDataset(trajectories, sequence_length, horizon, max_coins)
+    dataset.board_size = first.board_size
+    dataset.radius = torch.from_numpy(first.radius.reshape(-1, first.num_coins)[0].copy())
+    if max_coins is not None:
+        dataset.radius = dataset.radius.max().expand(max_coins)
+    return dataset
+
+
+def make_loader(dataset, batch_size=32, shuffle=False, workers=0, pin_memory=False, prefetch_factor=2, seed=0):
+    kwargs = {}
+    if workers > 0:
+        kwargs["prefetch_factor"] = prefetch_factor
+        kwargs["persistent_workers"] = True
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=workers,
+                      pin_memory=pin_memory, generator=torch.Generator().manual_seed(seed), **kwargs)
+
+
+# Learning rate for a larger batch: "linear" scales with batch_size / base_batch_size,
+# "sqrt" with its square root, "none" keeps it unchanged
+def scaled_lr(lr, batch_size, base_batch_size=32, rule="sqrt"):
+    if rule == "linear":
+        return lr * batch_size / base_batch_size
+    if rule == "sqrt":
+        return lr * math.sqrt(batch_size / base_batch_size)
+    return lr
+
+
+# target="last" is the original objective, the last frame of the input window itself;
+# target="next" predicts the frames after the window. With a multi-frame horizon in the
+# dataset the model is unrolled over those frames inside the batch, and each step feeds
+# back the true frame with probability teacher_forcing or its own prediction otherwise
+# (scheduled sampling), so training sees the errors a long rollout accumulates.
+# autocast_dtype=torch.bfloat16 runs the forward pass under autocast; the loss and
+# the master weights stay in float32.
+# Batches of a padded dataset carry a third (batch, coins) mask, passed to the model and loss.
+def train_epoch(model, loader, criterion, optimizer, device, autocast_dtype=None, target="last",
+                teacher_forcing=1.0):
+    model.train()
+    epoch_loss = 0
+    for batch in loader:
+        sequences, future = batch[:2]
+        mask = batch[2].to(device, non_blocking=True) if len(batch) > 2 else None
+        sequences = sequences.to(device, non_blocking=True)
+        optimizer.zero_grad()
+        if target == "last":
+            with torch.autocast(device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                output = model(sequences, mask)
+            loss = criterion(output.float(), sequences[:, -1, :], sequences, mask)
+        else:
+            future = future.to(device, non_blocking=True)
+            if future.dim() == 2:
+                future = future.unsqueeze(1)
+            window = sequences
+            loss = 0
+            for step in range(future.shape[1]):
+                with torch.autocast(device.type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                    output = model(window, mask).float()
+                loss = loss + criterion(output, future[:, step], window, mask)
+                if step + 1 < future.shape[1]:
+                    feed = future[:, step]
+                    if teacher_forcing < 1:
+                        use_truth = torch.rand(len(feed), 1, device=device) < teacher_forcing
+                        feed = torch.where(use_truth, feed, output)
+                    window = torch.cat([window[:, 1:], feed.unsqueeze(1)], dim=1)
+            loss = loss / future.shape[1]
+        loss.backward()
+        optimizer.step()
+        epoch_loss += loss.item()
+    return epoch_loss / len(loader)
+
+
+# Teacher forcing decays linearly from 1 in the first epoch to minimum in the last
+def teacher_forcing_schedule(epoch, num_epochs, minimum):
+    if num_epochs <= 1:
+        return minimum
+    return 1.0 - (1.0 - minimum) * epoch / (num_epochs - 1)
+
+
+def main(args):
+    torch.manual_seed(args.seed)
+    torch.set_num_threads(args.threads)
+    device = select_device(args.device)
+
+    if args.rollout_steps > 1 and args.target != "next":
+        raise SystemExit("--rollout-steps needs --target next")
+    # With --target last the prediction is trained towards the window's last frame, which
+    # the velocity and momentum terms (continue the last velocity) work against
+    if (args.velocity_weight or args.momentum_weight) and args.target != "next":
+        raise SystemExit("--velocity-weight and --momentum-weight need --target next")
+    try:
+        dataset = load_windows(args.data, args.sequence_length, args.rollout_steps, args.max_coins)
+    except ValueError as error:
+        raise SystemExit(error)
+    loader = make_loader(dataset, args.batch_size, args.shuffle, args.workers,
+                         args.pin_memory and device.type == "cuda", args.prefetch_factor, args.seed)
+    if args.max_coins is None:
+        input_dim = dataset.trajectories[0].shape[1]
+    else:
+        input_dim = 2 * args.max_coins
+    model = AutoencoderLSTM(input_dim=input_dim, latent_dim=args.latent_dim,
+                            sequence_length=args.sequence_length, masked=args.max_coins is not None).to(device)
+    criterion = PhysicsInformedLoss(dataset.radius, dataset.board_size, args.overlap_weight,
+                                    args.wall_weight, args.velocity_weight, args.momentum_weight)
+    lr = scaled_lr(args.lr, args.batch_size, args.base_batch_size, args.lr_scaling)
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    # The compiled wrapper shares parameters with model, so model.state_dict() is still saved
+    train_model = torch.compile(model) if args.compile else model
+    autocast_dtype = torch.bfloat16 if args.bf16 else None
+
+    print(f"Training on {device} with {torch.get_num_threads()} threads, {len(dataset)} windows, lr {lr:g}")
+    for epoch in range(args.epochs):
+        teacher_forcing = teacher_forcing_schedule(epoch, args.epochs, args.min_teacher_forcing)
+        loss = train_epoch(train_model, loader, criterion, optimizer, device, autocast_dtype,
+                           args.target, teacher_forcing)
+        terms = ", ".join(f"{name} {value.item():.4g}" for name, value in criterion.terms.items())
+        print(f"Epoch [{epoch+1}/{args.epochs}], Loss: {loss} (last batch: {terms})")
+
+    torch.save(model.state_dict(), args.output)
+    print(f"Model weights saved to {args.output}")
+
+
+def add_parser(commands):
+    parser = commands.add_parser("train", help="train AutoencoderLSTM on trajectory files")
+    parser.add_argument("data", nargs="+", help="trajectory .npz files (single or multi-board)")
+    parser.add_argument("--output", default="model_weights.pth")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--lr", type=float, default=0.001, help="learning rate at --base-batch-size")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--base-batch-size", type=int, default=32)
+    parser.add_argument("--lr-scaling", choices=("linear", "sqrt", "none"), default="sqrt",
+                        help="how the learning rate follows --batch-size")
+    parser.add_argument("--target", choices=("last", "next"), default="last",
+                        help="last: reconstruct the window's last frame (original); next: predict the following frames")
+    parser.add_argument("--rollout-steps", type=int, default=1, help="frames unrolled per window with --target next")
+    parser.add_argument("--min-teacher-forcing", type=float, default=1.0,
+                        help="teacher forcing decays from 1 to this over the epochs (1 = always feed true frames)")
+    parser.add_argument("--overlap-weight", type=float, default=0.0, help="physics loss: coin overlap")
+    parser.add_argument("--wall-weight", type=float, default=0.0, help="physics loss: wall penetration")
+    parser.add_argument("--velocity-weight", type=float, default=0.0, help="physics loss: velocity consistency (--target next)")
+    parser.add_argument("--momentum-weight", type=float, default=0.0, help="physics loss: total momentum (--target next)")
+    parser.add_argument("--compile", action="store_true", help="train through torch.compile")
+    parser.add_argument("--bf16", action="store_true", help="bfloat16 autocast for the forward pass")
+    parser.add_argument("--sequence-length", type=int, default=5)
+    parser.add_argument("--max-coins", type=int, default=None,
+                        help="pad boards to this many coins and train a masked model (mixed coin counts)")
+    parser.add_argument("--latent-dim", type=int, default=64)
+    parser.add_argument("--shuffle", action="store_true")
+    parser.add_argument("--device", default="auto", help="auto, cpu or cuda")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="torch intra-op threads")
+    parser.add_argument("--workers", type=int, default=0, help="DataLoader worker processes")
+    parser.add_argument("--pin-memory", action="store_true", help="pin batches for faster GPU copies")
+    parser.add_argument("--prefetch-factor", type=int, default=2, help="batches prefetched per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.set_defaults(func=main)
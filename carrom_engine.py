@@ -0,0 +1,420 @@
+import heapq
+import numpy as np
+
+
+# Velocities are in pixels per frame of the original simulators, which step once per
+# frame at 60 fps; a physics step of dt covers dt of those frames
+BASE_FPS = 60
+
+
+# Neighbour cells visited from each cell; together with the cell itself they cover
+# every adjacent cell exactly once per pair of cells
+NEIGHBOUR_OFFSETS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+# Uniform-grid broad phase: bucket coins into square cells of cell_size (at least the
+# largest contact distance) and return the candidate pairs (i < j) from adjacent cells only
+def grid_pairs(pos, cell_size):
+    num_coins = len(pos)
+    if num_coins < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    cells = np.floor(pos / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    # One spare column on each side so x - 1 / x + 1 never wrap onto another row
+    num_cols = cells[:, 0].max() + 3
+    keys = (cells[:, 1] * num_cols) + cells[:, 0] + 1
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    coin_range = np.arange(num_coins)
+
+    pairs_i = []
+    pairs_j = []
+    for dx, dy in ((0, 0),) + NEIGHBOUR_OFFSETS:
+        target = sorted_keys + dy * num_cols + dx
+        end = np.searchsorted(sorted_keys, target, side="right")
+        if dx == 0 and dy == 0:
+            # Same cell: only the coins after this one, so each pair is emitted once
+            start = coin_range + 1
+        else:
+            start = np.searchsorted(sorted_keys, target, side="left")
+        count = np.maximum(end - start, 0)
+        first = np.cumsum(count) - count
+        a = np.repeat(coin_range, count)
+        b = np.repeat(start - first, count) + np.arange(count.sum())
+        pairs_i.append(order[a])
+        pairs_j.append(order[b])
+
+    i = np.concatenate(pairs_i)
+    j = np.concatenate(pairs_j)
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+# Struct-of-arrays coin state: every coin is one row of pos/vel/radius/cor
+class Board:
+    def __init__(self, pos, vel, radius=10, cor=1, width=400, height=400, max_movement=None, broad_phase="auto",
+                 friction=None, sleep_speed=None, pockets=None, pocket_radius=30):
+        self.pos = np.array(pos, dtype=np.float64).reshape(-1, 2)
+        self.vel = np.array(vel, dtype=np.float64).reshape(-1, 2)
+        num_coins = len(self.pos)
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (num_coins,)).copy()
+        self.cor = np.broadcast_to(np.asarray(cor, dtype=np.float64), (num_coins,)).copy()
+        self.width = width
+        self.height = height
+        self.max_movement = max_movement  # Per-axis clamp used by carrom_3 / carrom_4
+        # "grid" (spatial hash), "all" (every i < j pair) or "auto" (all pairs for small boards)
+        self.broad_phase = broad_phase
+        # Table physics, all off by default: friction is a constant deceleration in px per
+        # frame per frame, coins slower than sleep_speed are put to sleep, and coins whose
+        # centre enters one of the (pockets, 2) circles of pocket_radius are captured
+        self.friction = friction
+        self.sleep_speed = sleep_speed
+        self.pockets = None if pockets is None else np.asarray(pockets, dtype=np.float64).reshape(-1, 2)
+        self.pocket_radius = pocket_radius
+        # Sleeping and pocketed coins are skipped by move, the wall test and the
+        # collision pairs; a sleeping coin wakes up when a moving coin hits it
+        self.awake = np.ones(num_coins, dtype=bool)
+        self.pocketed = np.zeros(num_coins, dtype=bool)
+        self.time = 0.0
+        self.collision_log = None  # collision_log.CollisionLog to record every impact into
+
+    def __len__(self):
+        return len(self.pos)
+
+    # Indices of the coins still moving, or None while every coin is (the common case,
+    # which keeps the whole-array code paths)
+    def moving_coins(self):
+        if self.awake is None or self.awake.all():
+            return None
+        return np.flatnonzero(self.awake)
+
+    def move(self, dt=1.0):
+        moving = self.moving_coins()
+        if moving is not None:
+            vel = self.vel[moving]
+            if self.max_movement is not None:
+                np.clip(vel, -self.max_movement, self.max_movement, out=vel)
+                self.vel[moving] = vel
+            self.pos[moving] += vel * dt
+            return
+        if self.max_movement is not None:
+            np.clip(self.vel, -self.max_movement, self.max_movement, out=self.vel)
+        if dt == 1:
+            self.pos += self.vel
+        else:
+            self.pos += self.vel * dt
+
+    def apply_deceleration(self, deceleration_rate=0.99):
+        self.vel *= deceleration_rate
+
+    def handle_wall_collision(self):
+        moving = self.moving_coins()
+        if moving is None:
+            pos, vel, radius = self.pos, self.vel, self.radius
+        else:
+            pos, vel, radius = self.pos[moving], self.vel[moving], self.radius[moving]
+        r = radius[..., None]
+        size = np.array([self.width, self.height], dtype=np.float64)
+        # Reflect only velocities heading into the wall so coins cannot stick to it
+        hit = ((pos - r <= 0) & (vel < 0)) | ((pos + r >= size) & (vel > 0))
+        np.negative(vel, out=vel, where=hit)
+        if moving is not None:
+            self.vel[moving] = vel
+
+    def coin_pairs(self):
+        moving = self.moving_coins()
+        small = self.broad_phase == "all" or (self.broad_phase == "auto" and len(self) < 64)
+        if moving is None:
+            if small:
+                return np.triu_indices(len(self), k=1)
+            return grid_pairs(self.pos, 2 * self.radius.max())
+        # Some coins sleep: only pairs with at least one moving coin can collide
+        if small:
+            # moving x on-board pairs, so the work follows the number of moving coins
+            on_board = np.flatnonzero(~self.pocketed)
+            i = np.repeat(moving, len(on_board))
+            j = np.tile(on_board, len(moving))
+            keep = (i != j) & (~self.awake[j] | (i < j))
+        else:
+            i, j = grid_pairs(self.pos, 2 * self.radius.max())
+            keep = (self.awake[i] | self.awake[j]) & ~self.pocketed[i] & ~self.pocketed[j]
+        i, j = i[keep], j[keep]
+        return np.minimum(i, j), np.maximum(i, j)
+
+    def handle_coin_collision(self):
+        # Flat (coins, 2) views, so BoardBatch can reuse this with board-offset pair indices
+        pos = self.pos.reshape(-1, 2)
+        vel = self.vel.reshape(-1, 2)
+        radius = self.radius.reshape(-1)
+        cor = self.cor.reshape(-1)
+
+        i, j = self.coin_pairs()
+        delta = pos[j] - pos[i]
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        hit = (dist < radius[i] + radius[j]) & (dist > 0)
+        i, j, delta, dist = i[hit], j[hit], delta[hit], dist[hit]
+
+        # Normal vectors and normal velocities of every touching pair
+        normal = delta / dist[:, None]
+        self_normal_velocity = np.einsum('ij,ij->i', normal, vel[i])
+        other_normal_velocity = np.einsum('ij,ij->i', normal, vel[j])
+
+        # Same COR exchange as Coin.handle_coin_collision, applied to all pairs at once.
+        # Only approaching pairs exchange momentum so overlapping coins cannot stick.
+        impulse = (1 + cor[i]) / 2 * np.minimum(other_normal_velocity - self_normal_velocity, 0)
+        dv = impulse[:, None] * normal
+
+        log = self.collision_log
+        if log is not None:
+            impact = impulse < 0
+            log_i, log_j = i[impact], j[impact]
+            rows = log.reserve(len(log_i))
+            columns = log.arrays
+            columns["time"][rows] = self.time
+            coins_per_board = self.pos.shape[-2]
+            np.floor_divide(log_i, coins_per_board, out=columns["board"][rows])
+            np.remainder(log_i, coins_per_board, out=columns["coin1"][rows])
+            np.remainder(log_j, coins_per_board, out=columns["coin2"][rows])
+            np.take(pos, log_i, axis=0, out=columns["coin1_pos"][rows])
+            np.take(pos, log_j, axis=0, out=columns["coin2_pos"][rows])
+            np.take(vel, log_i, axis=0, out=columns["coin1_vel_init"][rows])
+            np.take(vel, log_j, axis=0, out=columns["coin2_vel_init"][rows])
+
+        for axis in range(2):
+            vel[:, axis] += np.bincount(i, dv[:, axis], minlength=len(pos))
+            vel[:, axis] -= np.bincount(j, dv[:, axis], minlength=len(pos))
+        if log is not None:
+            # Velocities after every impulse of this step, including other simultaneous contacts
+            np.take(vel, log_i, axis=0, out=columns["coin1_vel_final"][rows])
+            np.take(vel, log_j, axis=0, out=columns["coin2_vel_final"][rows])
+        if self.awake is not None and len(i):
+            self.awake[i] = True
+            self.awake[j] = True
+        return i, j
+
+    # Friction, pocket capture and sleeping for the moving coins, after the collisions
+    def settle(self, dt=1.0):
+        if self.friction is None and self.sleep_speed is None and self.pockets is None:
+            return
+        moving = np.flatnonzero(self.awake)
+        vel = self.vel[moving]
+        speed = np.hypot(vel[:, 0], vel[:, 1])
+        if self.friction is not None:
+            slowed = np.maximum(speed - self.friction * dt, 0)
+            np.divide(slowed, speed, out=speed, where=speed > 0)
+            vel *= speed[:, None]
+            self.vel[moving] = vel
+            speed = slowed
+        stopped = np.zeros(len(moving), dtype=bool)
+        if self.pockets is not None:
+            delta = self.pos[moving, None, :] - self.pockets[None, :, :]
+            captured = (np.hypot(delta[..., 0], delta[..., 1]) < self.pocket_radius).any(axis=1)
+            self.pocketed[moving[captured]] = True
+            stopped |= captured
+        if self.sleep_speed is not None:
+            stopped |= speed < self.sleep_speed
+        stopped = moving[stopped]
+        self.awake[stopped] = False
+        self.vel[stopped] = 0
+
+    def step(self, dt=1.0):
+        self.move(dt)
+        self.time += dt
+        self.handle_wall_collision()
+        hits = self.handle_coin_collision()
+        self.settle(dt)
+        return hits
+
+
+# Time from now until coins at offset dp with relative velocity dv first touch at
+# distance reach; inf when they never do. Overlapping pairs that still approach get 0.
+def impact_times(dp, dv, reach):
+    b = np.einsum('ij,ij->i', dp, dv)
+    a = np.einsum('ij,ij->i', dv, dv)
+    c = np.einsum('ij,ij->i', dp, dp) - reach * reach
+    disc = b * b - a * c
+    times = np.full(len(dp), np.inf)
+    hit = (b < 0) & (disc >= 0)
+    # c / (-b + sqrt(disc)) is the smaller root of a t^2 + 2 b t + c, without cancellation
+    times[hit] = np.maximum(c[hit] / (np.sqrt(disc[hit]) - b[hit]), 0)
+    return times
+
+
+# Time until each coin reaches the wall it is heading towards, per axis (coins, 2)
+def wall_times(pos, vel, radius, width, height):
+    r = radius[:, None]
+    size = np.array([width, height], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        times = np.where(vel > 0, (size - r - pos) / vel, np.where(vel < 0, (r - pos) / vel, np.inf))
+    return np.maximum(times, 0)
+
+
+# Event-driven solver: instead of moving a fixed step and resolving overlaps, every coin-coin
+# and coin-wall impact time is computed analytically and kept in a priority queue; coins
+# fly straight to the next impact, which is resolved exactly at contact. No coin can tunnel,
+# so there is no max_movement clamp and step(dt) may cover any time span.
+# Each queued event carries the collision counts of its coins when it was predicted, so
+# events made stale by a later collision are skipped when popped.
+class EventBoard(Board):
+    def __init__(self, pos, vel, radius=10, cor=1, width=400, height=400):
+        super(EventBoard, self).__init__(pos, vel, radius=radius, cor=cor, width=width, height=height)
+        self.events = 0
+        self.schedule()
+
+    # Rebuild the queue from scratch, needed whenever velocities change outside a collision
+    def schedule(self):
+        num_coins = len(self)
+        self._counts = np.zeros(num_coins, dtype=np.int64)
+        i, j = np.triu_indices(num_coins, k=1)
+        times = impact_times(self.pos[j] - self.pos[i], self.vel[j] - self.vel[i], self.radius[i] + self.radius[j])
+        hit = np.isfinite(times)
+        self._queue = [(self.time + t, a, b, 0, 0) for t, a, b in zip(times[hit].tolist(), i[hit].tolist(), j[hit].tolist())]
+        walls = wall_times(self.pos, self.vel, self.radius, self.width, self.height)
+        for coin, axis in zip(*np.nonzero(np.isfinite(walls))):
+            # Walls are encoded as j = -1 (x) and j = -2 (y)
+            self._queue.append((self.time + walls[coin, axis], int(coin), -1 - int(axis), 0, 0))
+        heapq.heapify(self._queue)
+
+    def _predict(self, k):
+        times = impact_times(self.pos - self.pos[k], self.vel - self.vel[k], self.radius + self.radius[k])
+        times[k] = np.inf
+        counts = self._counts
+        for j in np.flatnonzero(np.isfinite(times)).tolist():
+            a, b = min(k, j), max(k, j)
+            heapq.heappush(self._queue, (self.time + times[j], a, b, counts[a], counts[b]))
+        walls = wall_times(self.pos[k:k + 1], self.vel[k:k + 1], self.radius[k:k + 1], self.width, self.height)[0]
+        for axis in np.flatnonzero(np.isfinite(walls)).tolist():
+            heapq.heappush(self._queue, (self.time + walls[axis], k, -1 - axis, counts[k], 0))
+
+    def _drift(self, time):
+        if time > self.time:
+            self.pos += self.vel * (time - self.time)
+            self.time = time
+
+    def _collide(self, i, j):
+        delta = self.pos[j] - self.pos[i]
+        normal = delta / np.hypot(delta[0], delta[1])
+        relative = np.dot(normal, self.vel[j]) - np.dot(normal, self.vel[i])
+        dv = (1 + self.cor[i]) / 2 * min(relative, 0) * normal
+        init_i, init_j = self.vel[i].copy(), self.vel[j].copy()
+        self.vel[i] += dv
+        self.vel[j] -= dv
+        if self.collision_log is not None:
+            self.collision_log.record(self.time, 0, i, j, self.pos[i], self.pos[j], init_i, init_j,
+                                      self.vel[i], self.vel[j])
+
+    # Process every event up to time end, then move all coins to it. Returns the (i, j)
+    # coin pairs that collided, like Board.step.
+    def advance(self, end):
+        hits_i = []
+        hits_j = []
+        counts = self._counts
+        while self._queue and self._queue[0][0] <= end:
+            time, i, j, count_i, count_j = heapq.heappop(self._queue)
+            if count_i != counts[i] or (j >= 0 and count_j != counts[j]):
+                continue
+            self._drift(time)
+            if j < 0:
+                self.vel[i, -1 - j] = -self.vel[i, -1 - j]
+            else:
+                self._collide(i, j)
+                hits_i.append(i)
+                hits_j.append(j)
+                counts[j] += 1
+            counts[i] += 1
+            self.events += 1
+            self._predict(i)
+            if j >= 0:
+                self._predict(j)
+        self._drift(end)
+        # Stale events pile up over long runs; start over once they dominate the queue
+        if len(self._queue) > 8 * len(self) * len(self):
+            self.schedule()
+        return np.array(hits_i, dtype=np.int64), np.array(hits_j, dtype=np.int64)
+
+    def step(self, dt=1.0):
+        return self.advance(self.time + dt)
+
+    def apply_deceleration(self, deceleration_rate=0.99):
+        self.vel *= deceleration_rate
+        self.schedule()
+
+
+# Substeps per recorded frame and the physics dt for simulating at physics_hz and
+# recording at fps. The substep count is rounded, so the physics rate actually used is
+# fps * substeps (2 kHz recorded at 120 fps runs 17 substeps, i.e. 2040 Hz).
+# physics_hz=None takes one step per recorded frame, so the recorded frames still
+# advance 1 / fps seconds each (dt = 1 at 60 fps).
+def substep_dt(physics_hz, fps):
+    if physics_hz is None:
+        physics_hz = fps
+    substeps = max(1, round(physics_hz / fps))
+    return BASE_FPS / (fps * substeps), substeps
+
+
+# The four corner pockets drawn by draw_carrom_board, inset from the board edges
+def corner_pockets(width, height, inset=50):
+    return np.array([[inset, inset], [width - inset, inset], [inset, height - inset], [width - inset, height - inset]],
+                    dtype=np.float64)
+
+
+# Non-overlapping random placement, vectorized version of create_coins.
+# event_driven=True returns an EventBoard, which needs no max_movement clamp.
+def create_board(num_coins, width, height, radius=10, speed=3, cor=1, max_movement=None, broad_phase="auto", rng=None, seed=None,
+                 event_driven=False, friction=None, sleep_speed=None, pockets=None, pocket_radius=30):
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    pos = np.empty((num_coins, 2), dtype=np.float64)
+    placed = 0
+    while placed < num_coins:
+        candidate = rng.integers(20, [width - 20, height - 20], endpoint=True).astype(np.float64)
+        if placed:
+            delta = pos[:placed] - candidate
+            if np.any(np.hypot(delta[:, 0], delta[:, 1]) < 2 * radius):
+                continue
+        pos[placed] = candidate
+        placed += 1
+    vel = rng.uniform(-speed, speed, size=(num_coins, 2))
+    if event_driven:
+        return EventBoard(pos, vel, radius=radius, cor=cor, width=width, height=height)
+    return Board(pos, vel, radius=radius, cor=cor, width=width, height=height, max_movement=max_movement, broad_phase=broad_phase,
+                 friction=friction, sleep_speed=sleep_speed, pockets=pockets, pocket_radius=pocket_radius)
+
+
+# Many independent boards stepped together: pos/vel are (boards, coins, 2) and
+# radius/cor are (boards, coins). Coins only ever collide with coins on their own board.
+class BoardBatch(Board):
+    def __init__(self, pos, vel, radius=10, cor=1, width=400, height=400, max_movement=None, seeds=None):
+        self.pos = np.array(pos, dtype=np.float64)
+        self.vel = np.array(vel, dtype=np.float64).reshape(self.pos.shape)
+        shape = self.pos.shape[:2]
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), shape).copy()
+        self.cor = np.broadcast_to(np.asarray(cor, dtype=np.float64), shape).copy()
+        self.width = width
+        self.height = height
+        self.max_movement = max_movement
+        self.seeds = seeds
+        # Friction, sleeping and pockets are single-board features
+        self.friction = self.sleep_speed = self.pockets = None
+        self.awake = None
+        self.time = 0.0
+        self.collision_log = None
+
+    @property
+    def num_coins(self):
+        return self.pos.shape[1]
+
+    def coin_pairs(self):
+        i, j = np.triu_indices(self.num_coins, k=1)
+        offsets = np.arange(len(self))[:, None] * self.num_coins
+        return (offsets + i).ravel(), (offsets + j).ravel()
+
+
+# Every board gets its own seed, so board k of a batch is identical to
+# create_board(..., seed=batch.seeds[k]) run on its own
+def create_batch(num_boards, num_coins, width, height, radius=10, speed=3, cor=1, max_movement=None, seed=None):
+    seeds = np.random.SeedSequence(seed).generate_state(num_boards, dtype=np.uint64)
+    boards = [create_board(num_coins, width, height, radius=radius, speed=speed, seed=int(board_seed))
+              for board_seed in seeds]
+    return BoardBatch([board.pos for board in boards], [board.vel for board in boards], radius=radius,
+                      cor=cor, width=width, height=height, max_movement=max_movement, seeds=seeds)
@@ -0,0 +1,156 @@
+import argparse
+import os
+import numpy as np
+from checkpoint import load_checkpoint, save_checkpoint
+from carrom_engine import corner_pockets, create_batch, create_board, substep_dt
+from collision_log import CollisionLog
+from trajectory_io import TrajectoryWriter, write_csv
+
+
+# Step the board (or BoardBatch) without any display and yield positions in fixed-size
+# chunks. The yielded array is reused, so consume (or copy) it before asking for the next one.
+# Every recorded frame is substeps physics steps of dt (see substep_dt); only the last
+# substep is written out. deceleration is the velocity factor per dt = 1 and is applied
+# as deceleration ** dt every substep, so it does not depend on the physics rate.
+def run(board, steps=None, chunk_size=1024, deceleration=None, rest_speed=None, dt=1.0, substeps=1):
+    buffer = np.empty((chunk_size,) + board.pos.shape, dtype=np.float64)
+    filled = 0
+    frames = 0
+    if deceleration is not None:
+        deceleration = deceleration ** dt
+    while steps is None or frames < steps:
+        for _ in range(substeps):
+            board.step(dt)
+            if deceleration is not None:
+                board.apply_deceleration(deceleration)
+        buffer[filled] = board.pos
+        filled += 1
+        frames += 1
+        if filled == chunk_size:
+            yield buffer
+            filled = 0
+        # Stop once every coin has come (almost) to rest
+        if rest_speed is not None and np.hypot(board.vel[..., 0], board.vel[..., 1]).max() < rest_speed:
+            break
+    if filled:
+        yield buffer[:filled]
+
+
+# Attach a collision log to the board and flush it to path after every chunk
+def log_collisions(chunks, board, path):
+    board.collision_log = CollisionLog()
+    for chunk in chunks:
+        yield chunk
+        board.collision_log.flush(path)
+    board.collision_log.close(path)
+
+
+# Stream the chunks to disk in the trajectory format with constant memory.
+# A BoardBatch is stored as (boards, frames, coins, 2) with the per-board seeds.
+# With a checkpoint path the written frames are synced and the board saved every
+# checkpoint_every frames (at chunk boundaries); start_frame continues a run resumed
+# from such a checkpoint. The checkpoint is removed once the trajectory is complete.
+# finalize_on_exit also packs the file on SIGTERM / exit (TrajectoryWriter.finalize_on_exit),
+# for command-line runs only.
+def write_trajectory(path, chunks, board, fps=60, seed=None, checkpoint=None, checkpoint_every=10000,
+                     start_frame=0, extra=None, finalize_on_exit=False):
+    if seed is None:
+        seed = getattr(board, "seeds", None)
+    with TrajectoryWriter(path, board.pos.shape, fps, (board.width, board.height), board.radius, seed,
+                          resume_frames=start_frame or None) as writer:
+        if finalize_on_exit:
+            writer.finalize_on_exit()
+        saved = writer.num_frames
+        for chunk in chunks:
+            writer.append_chunk(chunk)
+            if checkpoint is not None and writer.num_frames - saved >= checkpoint_every:
+                writer.flush()
+                save_checkpoint(checkpoint, board, writer.num_frames, extra=extra)
+                saved = writer.num_frames
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return writer.num_frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless carrom simulation for dataset generation")
+    parser.add_argument("--boards", type=int, default=None, help="simulate this many independent boards into one trajectory file")
+    parser.add_argument("--coins", type=int, default=15)
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--height", type=int, default=400)
+    parser.add_argument("--steps", type=int, default=None, help="number of frames to simulate")
+    parser.add_argument("--max-movement", type=float, default=0.75, help="per-axis velocity clamp, <= 0 disables it")
+    parser.add_argument("--solver", choices=("step", "event"), default="step",
+                        help="step: fixed step with overlap resolution; event: exact impact times, no clamp")
+    parser.add_argument("--deceleration", type=float, default=None, help="velocity factor applied every frame, e.g. 0.99")
+    parser.add_argument("--friction", type=float, default=None, help="constant deceleration in px/frame per frame, e.g. 0.02")
+    parser.add_argument("--sleep-speed", type=float, default=None, help="coins slower than this stop and sleep until hit")
+    parser.add_argument("--pockets", action="store_true", help="capture coins in the four corner pockets")
+    parser.add_argument("--pocket-radius", type=float, default=30)
+    parser.add_argument("--rest-speed", type=float, default=None, help="stop once every coin is slower than this")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--fps", type=float, default=60, help="recorded frames per second, stored in the trajectory header")
+    parser.add_argument("--physics-hz", type=float, default=None,
+                        help="physics steps per second, e.g. 2000 with --fps 120; by default one step per recorded frame")
+    parser.add_argument("--collisions", default=None, help="also log every coin-coin impact to this .csv or .parquet")
+    parser.add_argument("--output", default=None,
+                        help="trajectory .npz (default coin_positions.npz / coin_trajectories.npz), or .csv to export")
+    parser.add_argument("--checkpoint", default=None, help="save the simulation state to this .npz while running")
+    parser.add_argument("--checkpoint-every", type=int, default=10000, help="frames between checkpoints")
+    parser.add_argument("--resume", default=None,
+                        help="continue the run saved in this checkpoint; every other option is taken from it")
+    args = parser.parse_args(argv)
+
+    start_frame = 0
+    if args.resume:
+        board, start_frame, _, extra = load_checkpoint(args.resume)
+        args = argparse.Namespace(**extra["args"])
+        print(f"Resuming {args.output} from frame {start_frame}")
+
+    if args.steps is None and args.rest_speed is None:
+        parser.error("give --steps and/or --rest-speed, otherwise the simulation never stops")
+    if args.solver == "event" and args.boards is not None:
+        parser.error("--solver event simulates a single board")
+    table = args.friction is not None or args.sleep_speed is not None or args.pockets
+    if table and (args.boards is not None or args.solver == "event"):
+        parser.error("--friction, --sleep-speed and --pockets need a single board and --solver step")
+    if args.output is None:
+        args.output = "coin_positions.npz" if args.boards is None else "coin_trajectories.npz"
+    if args.checkpoint and (args.output.endswith(".csv") or args.collisions):
+        parser.error("--checkpoint needs .npz output and no --collisions log")
+    if args.output.endswith(".csv") and args.boards is not None:
+        parser.error("--boards is written as a multi-board .npz, the .csv layout holds a single board")
+    # The options go into every checkpoint so --resume can rebuild the run
+    extra = {"args": vars(args)}
+
+    max_movement = args.max_movement if args.max_movement > 0 else None
+    dt, substeps = substep_dt(args.physics_hz, args.fps)
+    if substeps > 1 or dt != 1:
+        print(f"Physics at {args.fps * substeps:g} Hz: {substeps} substeps of dt {dt:g} per frame")
+    # A resumed run already has its board from the checkpoint
+    if not start_frame:
+        if args.boards is None:
+            pockets = corner_pockets(args.width, args.height) if args.pockets else None
+            board = create_board(args.coins, args.width, args.height, max_movement=max_movement, seed=args.seed,
+                                 event_driven=args.solver == "event", friction=args.friction,
+                                 sleep_speed=args.sleep_speed, pockets=pockets, pocket_radius=args.pocket_radius)
+        else:
+            board = create_batch(args.boards, args.coins, args.width, args.height, max_movement=max_movement,
+                                 seed=args.seed)
+    # A BoardBatch records its per-board seeds instead
+    seed = args.seed if args.boards is None else None
+    steps = None if args.steps is None else args.steps - start_frame
+    chunks = run(board, steps, args.chunk_size, args.deceleration, args.rest_speed, dt, substeps)
+    if args.collisions:
+        chunks = log_collisions(chunks, board, args.collisions)
+    if args.output.endswith(".csv"):
+        frames = write_csv(args.output, chunks, args.coins)
+    else:
+        frames = write_trajectory(args.output, chunks, board, args.fps, seed, args.checkpoint,
+                                  args.checkpoint_every, start_frame, extra, finalize_on_exit=True)
+    print(f"No of frames: {frames}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import json
+import os
+import numpy as np
+from carrom_engine import Board, BoardBatch, EventBoard
+
+BOARD_TYPES = {"Board": Board, "BoardBatch": BoardBatch, "EventBoard": EventBoard}
+BOARD_ARRAYS = ("pos", "vel", "radius", "cor", "awake", "pocketed", "pockets", "seeds")
+BOARD_SETTINGS = ("width", "height", "max_movement", "broad_phase", "friction", "sleep_speed",
+                  "pocket_radius", "time", "events")
+
+
+# Write to "<path>.tmp" first and rename, so a crash mid-write never leaves a broken checkpoint
+def _atomic_savez(path, **arrays):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Everything needed to continue a simulation exactly where it stopped: the coin arrays,
+# the board settings and time, the number of frames written, the state of the random
+# generator (if the caller still draws from one) and extra JSON-serializable data such
+# as the command-line arguments. An EventBoard also keeps its pending event queue.
+def save_checkpoint(path, board, frame, rng=None, extra=None):
+    arrays = {name: getattr(board, name) for name in BOARD_ARRAYS if getattr(board, name, None) is not None}
+    if isinstance(board, EventBoard):
+        # The pending events as they are, so the resumed run replays the same impacts
+        arrays["queue_time"] = np.array([event[0] for event in board._queue], dtype=np.float64)
+        arrays["queue_events"] = np.array([event[1:] for event in board._queue], dtype=np.int64).reshape(-1, 4)
+        arrays["counts"] = board._counts
+    meta = {
+        "type": type(board).__name__,
+        "settings": {name: getattr(board, name, None) for name in BOARD_SETTINGS},
+        "frame": int(frame),
+        "rng": None if rng is None else rng.bit_generator.state,
+        "extra": extra,
+    }
+    _atomic_savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+# Returns (board, frame, rng, extra) as passed to save_checkpoint
+def load_checkpoint(path):
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        arrays = {name: data[name] for name in data.files if name != "meta"}
+    settings = meta["settings"]
+    board_type = BOARD_TYPES[meta["type"]]
+    if board_type is BoardBatch:
+        board = BoardBatch(arrays["pos"], arrays["vel"], arrays["radius"], arrays["cor"], settings["width"],
+                           settings["height"], settings["max_movement"], arrays.get("seeds"))
+    elif board_type is EventBoard:
+        board = EventBoard(arrays["pos"], arrays["vel"], arrays["radius"], arrays["cor"], settings["width"],
+                           settings["height"])
+    else:
+        board = Board(arrays["pos"], arrays["vel"], arrays["radius"], arrays["cor"], settings["width"],
+                      settings["height"], settings["max_movement"], settings["broad_phase"], settings["friction"],
+                      settings["sleep_speed"], arrays.get("pockets"), settings["pocket_radius"])
+    if board_type is not BoardBatch:
+        board.awake = arrays["awake"].copy()
+        board.pocketed = arrays["pocketed"].copy()
+    board.time = settings["time"]
+    if board_type is EventBoard:
+        board.events = settings["events"]
+        board._counts = arrays["counts"].copy()
+        board._queue = [(time,) + tuple(event) for time, event in
+                        zip(arrays["queue_time"].tolist(), arrays["queue_events"].tolist())]
+
+    rng = None
+    if meta["rng"] is not None:
+        rng = np.random.default_rng()
+        rng.bit_generator.state = meta["rng"]
+    return board, meta["frame"], rng, meta["extra"]
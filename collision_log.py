@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# (column, per-event shape, dtype); 2-vectors become <name>_x / <name>_y columns on export
+FIELDS = (
+    ("time", (), np.float64),
+    ("board", (), np.int64),
+    ("coin1", (), np.int64),
+    ("coin2", (), np.int64),
+    ("coin1_pos", (2,), np.float64),
+    ("coin2_pos", (2,), np.float64),
+    ("coin1_vel_init", (2,), np.float64),
+    ("coin2_vel_init", (2,), np.float64),
+    ("coin1_vel_final", (2,), np.float64),
+    ("coin2_vel_final", (2,), np.float64),
+)
+
+
+# Collision events in preallocated typed arrays that double in size when full, so
+# recording never reallocates per event. Board.handle_coin_collision fills it when a
+# log is attached as board.collision_log; init velocities are taken before the impulses
+# are applied and final velocities after, so they really are pre- and post-impact.
+# flush() appends the buffered events to a .csv or .parquet file in bulk and empties the
+# buffer, so long runs can be logged with bounded memory.
+class CollisionLog:
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.arrays = {name: np.empty((capacity,) + shape, dtype=dtype) for name, shape, dtype in FIELDS}
+        self._parquet = None
+        self._csv_header = {}
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return len(self.arrays["time"])
+
+    def _reserve(self, count):
+        needed = self.size + count
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity)
+        for name, array in self.arrays.items():
+            grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[name] = grown
+
+    # Reserve room for count events and return the slice they go into
+    def reserve(self, count):
+        self._reserve(count)
+        start = self.size
+        self.size += count
+        return slice(start, self.size)
+
+    # Record events given as arrays (or scalars for a single event)
+    def record(self, time, board, coin1, coin2, coin1_pos, coin2_pos, coin1_vel_init, coin2_vel_init,
+               coin1_vel_final, coin2_vel_final):
+        coin1 = np.atleast_1d(coin1)
+        rows = self.reserve(len(coin1))
+        values = (time, board, coin1, coin2, coin1_pos, coin2_pos, coin1_vel_init, coin2_vel_init,
+                  coin1_vel_final, coin2_vel_final)
+        for (name, _, _), value in zip(FIELDS, values):
+            self.arrays[name][rows] = value
+
+    def clear(self):
+        self.size = 0
+
+    def to_frame(self):
+        columns = {}
+        for name, shape, _ in FIELDS:
+            values = self.arrays[name][:self.size]
+            if shape:
+                columns[name + "_x"] = values[:, 0]
+                columns[name + "_y"] = values[:, 1]
+            else:
+                columns[name] = values
+        return pd.DataFrame(columns)
+
+    # The first flush to a path creates the file even without events, so a run with no
+    # impacts still leaves an empty table with the header (or parquet schema)
+    def flush(self, path):
+        parquet = str(path).endswith(".parquet")
+        started = self._parquet is not None if parquet else not self._csv_header.get(path, True)
+        if self.size or not started:
+            frame = self.to_frame()
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if self._parquet is None:
+                    self._parquet = pq.ParquetWriter(path, table.schema)
+                self._parquet.write_table(table)
+            else:
+                header = self._csv_header.setdefault(path, True)
+                frame.to_csv(path, mode="w" if header else "a", header=header, index=False)
+                self._csv_header[path] = False
+        self.clear()
+
+    # Flush what is left and finish the file
+    def close(self, path=None):
+        if path is not None:
+            self.flush(path)
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+
+def load_collisions(path):
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
@@ -0,0 +1,135 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from carrom_engine import create_batch, substep_dt
+from carrom_headless import run, write_trajectory
+from checkpoint import load_checkpoint
+from trajectory_io import load_trajectory
+
+CONFIG_KEYS = ("seed", "shards", "boards", "coins", "width", "height", "steps", "max_movement", "deceleration",
+               "fps", "physics_hz")
+
+
+# Shard k always gets the same seed for a given root seed, whatever the worker count
+def shard_seeds(seed, shards):
+    return [int(child.generate_state(1, dtype=np.uint64)[0])
+            for child in np.random.SeedSequence(seed).spawn(shards)]
+
+
+# A shard left by an interrupted run counts as finished only if it holds every frame;
+# an interrupted writer may still have packed the frames it had into the .npz
+def _finished(path, steps):
+    if not os.path.exists(path) or os.path.exists(path + ".part"):
+        return False
+    return load_trajectory(path, mmap=True).num_frames == steps
+
+
+# With checkpoint_every set, every shard keeps "shard_XXXXX.ckpt.npz" while it runs; a resumed
+# job continues unfinished shards from their checkpoint, skips the finished ones and
+# simulates the rest again from the start
+def simulate_shard(job):
+    config = job["config"]
+    path = os.path.join(job["out_dir"], job["file"])
+    checkpoint = path[:-len(".npz")] + ".ckpt.npz" if job["checkpoint_every"] else None
+    start_frame = 0
+    if job["resume"] and checkpoint and os.path.exists(checkpoint):
+        batch, start_frame, _, _ = load_checkpoint(checkpoint)
+    elif job["resume"] and _finished(path, config["steps"]):
+        return _shard_entry(job, path)
+    else:
+        max_movement = config["max_movement"] if config["max_movement"] > 0 else None
+        batch = create_batch(config["boards"], config["coins"], config["width"], config["height"],
+                             max_movement=max_movement, seed=job["seed"])
+    # Manifests written before fps / physics_hz existed used one step per 60 fps frame
+    fps = config.get("fps", 60)
+    physics_hz = config.get("physics_hz")
+    dt, substeps = substep_dt(physics_hz, fps)
+    chunks = run(batch, config["steps"] - start_frame, deceleration=config["deceleration"], dt=dt, substeps=substeps)
+    write_trajectory(path, chunks, batch, fps, checkpoint=checkpoint, checkpoint_every=job["checkpoint_every"],
+                     start_frame=start_frame)
+    return _shard_entry(job, path)
+
+
+def _shard_entry(job, path, block_frames=65536):
+    # Hash the trajectory data rather than the file, zip timestamps differ between runs.
+    # The shard stays memory-mapped and is hashed a block of frames at a time, in the
+    # same byte order as hashing the whole array at once.
+    positions = load_trajectory(path, mmap=True).positions
+    digest = hashlib.sha256()
+    for board in positions:
+        for start in range(0, board.shape[0], block_frames):
+            digest.update(np.ascontiguousarray(board[start:start + block_frames]))
+    frames = positions.shape[1]
+    del positions
+    return {"file": job["file"], "seed": job["seed"], "boards": job["config"]["boards"],
+            "frames": frames, "sha256": digest.hexdigest()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a sharded carrom trajectory dataset on all cores")
+    parser.add_argument("--out-dir", default="dataset")
+    parser.add_argument("--shards", type=int, default=os.cpu_count())
+    parser.add_argument("--boards", type=int, default=64, help="boards per shard")
+    parser.add_argument("--coins", type=int, default=15)
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--height", type=int, default=400)
+    parser.add_argument("--steps", type=int, default=10000, help="frames per board")
+    parser.add_argument("--max-movement", type=float, default=0.75, help="per-axis velocity clamp, <= 0 disables it")
+    parser.add_argument("--deceleration", type=float, default=None)
+    parser.add_argument("--fps", type=float, default=60, help="recorded frames per second")
+    parser.add_argument("--physics-hz", type=float, default=None, help="physics steps per second, default one per frame")
+    parser.add_argument("--seed", type=int, default=None, help="root seed, drawn at random and recorded if omitted")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--from-manifest", default=None, help="regenerate exactly the dataset described by a manifest")
+    parser.add_argument("--checkpoint-every", type=int, default=None,
+                        help="frames between per-shard checkpoints, 0 (default) disables them; kept by --resume")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run in --out-dir: finished shards are kept, the rest resume")
+    args = parser.parse_args(argv)
+
+    # An interrupted run has not written its manifest yet, so its config and checkpoint
+    # interval are kept next to the shards
+    config_path = os.path.join(args.out_dir, "config.json")
+    if args.resume:
+        with open(config_path) as f:
+            saved = json.load(f)
+        config = saved["config"]
+        if args.checkpoint_every not in (None, saved["checkpoint_every"]):
+            parser.error(f"the run in {args.out_dir} checkpoints every {saved['checkpoint_every']} frames, "
+                         f"not {args.checkpoint_every}")
+        args.checkpoint_every = saved["checkpoint_every"]
+    elif args.from_manifest:
+        with open(args.from_manifest) as f:
+            config = json.load(f)["config"]
+    else:
+        config = {key: getattr(args, key) for key in CONFIG_KEYS}
+        if config["seed"] is None:
+            config["seed"] = int(np.random.SeedSequence().entropy)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    if not args.resume:
+        args.checkpoint_every = args.checkpoint_every or 0
+        with open(config_path, "w") as f:
+            json.dump({"config": config, "checkpoint_every": args.checkpoint_every}, f, indent=2)
+    jobs = [{"config": config, "seed": seed, "out_dir": args.out_dir, "file": f"shard_{k:05d}.npz",
+             "checkpoint_every": args.checkpoint_every, "resume": args.resume}
+            for k, seed in enumerate(shard_seeds(config["seed"], config["shards"]))]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        shards = []
+        for shard in executor.map(simulate_shard, jobs):
+            shards.append(shard)
+            print(f"\rShards: {len(shards)}/{len(jobs)}", end="")
+    print()
+
+    with open(os.path.join(args.out_dir, "manifest.json"), "w") as f:
+        json.dump({"config": config, "shards": shards}, f, indent=2)
+    total = sum(shard["boards"] * shard["frames"] for shard in shards)
+    print(f"No of frames: {total}")
+
+
+if __name__ == "__main__":
+    main()
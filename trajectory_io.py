@@ -0,0 +1,293 @@
+import atexit
+import os
+import queue
+import signal
+import struct
+import sys
+import threading
+import zipfile
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+
+# Coin positions as float32 (frames, coins, 2), or (trajectories, frames, coins, 2)
+# for multi-board datasets, plus the header needed to replay or re-simulate them
+class Trajectory:
+    def __init__(self, positions, fps=60, board_size=(400, 400), radius=10, seed=None):
+        self.positions = positions
+        self.fps = fps
+        self.board_size = tuple(board_size)
+        coin_shape = positions.shape[:-3] + positions.shape[-2:-1]
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=np.float32), coin_shape)
+        self.seed = seed
+
+    @property
+    def num_frames(self):
+        return self.positions.shape[-3]
+
+    @property
+    def num_coins(self):
+        return self.positions.shape[-2]
+
+    def __len__(self):
+        return self.num_frames
+
+    # Frame range as a view of positions; no copy is made for memory-mapped files
+    def frames(self, start=0, stop=None):
+        return self.positions[..., start:stop, :, :]
+
+    def torch_frames(self, start=0, stop=None):
+        import torch
+        return torch.from_numpy(self.frames(start, stop))
+
+
+def _header_arrays(coin_shape, fps, board_size, radius, seed):
+    return {
+        "version": np.int64(FORMAT_VERSION),
+        "fps": np.float64(fps),
+        "board_size": np.asarray(board_size, dtype=np.float64),
+        "radius": np.broadcast_to(np.asarray(radius, dtype=np.float32), coin_shape),
+        "seed": np.asarray([] if seed is None else seed, dtype=np.uint64),
+    }
+
+
+# Uncompressed .npz: one float32 array per field, no string parsing on load
+def save_trajectory(path, positions, fps=60, board_size=(400, 400), radius=10, seed=None):
+    positions = np.ascontiguousarray(positions, dtype=np.float32)
+    coin_shape = positions.shape[:-3] + positions.shape[-2:-1]
+    np.savez(path, positions=positions, **_header_arrays(coin_shape, fps, board_size, radius, seed))
+
+
+# Streams frames to disk with constant memory: frames are copied into a small pool of
+# chunk buffers and a background thread appends full chunks to "<path>.part". close()
+# packs the raw frames into the same .npz layout as save_trajectory.
+# frame_shape is (coins, 2), or (boards, coins, 2) for a BoardBatch, in which case the
+# file is written as (boards, frames, coins, 2) like every other multi-board trajectory.
+# resume_frames continues an interrupted run after its first resume_frames frames, taken
+# from the leftover "<path>.part" or, if the last run got to finish, from the packed file.
+class TrajectoryWriter:
+    def __init__(self, path, frame_shape, fps=60, board_size=(400, 400), radius=10, seed=None,
+                 chunk_size=4096, buffers=3, resume_frames=None):
+        self.path = path if str(path).endswith(".npz") else f"{path}.npz"
+        self.part_path = self.path + ".part"
+        self.frame_shape = tuple(frame_shape)
+        self.header = _header_arrays(self.frame_shape[:-1], fps, board_size, radius, seed)
+        self.chunk_size = chunk_size
+        self.num_frames = 0
+        self.closed = False
+        self._sigterm = None
+
+        if resume_frames is None:
+            self._part = open(self.part_path, "wb")
+        else:
+            self._restore(resume_frames)
+        self._free = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(np.empty((chunk_size,) + self.frame_shape, dtype=np.float32))
+        self._full = queue.Queue()
+        self._error = None
+        self._buffer = self._free.get()
+        self._filled = 0
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _restore(self, num_frames):
+        frame_bytes = int(np.prod(self.frame_shape)) * 4
+        if not os.path.exists(self.part_path):
+            positions = _memmap_npz_member(self.path, "positions")
+            if len(self.frame_shape) == 3:
+                positions = positions.swapaxes(0, 1)
+            if len(positions) < num_frames:
+                raise ValueError(f"{self.path} has {len(positions)} frames, cannot resume after {num_frames}")
+            with open(self.part_path, "wb") as f:
+                for start in range(0, num_frames, self.chunk_size):
+                    f.write(np.ascontiguousarray(positions[start:min(start + self.chunk_size, num_frames)]).tobytes())
+            del positions
+        elif os.path.getsize(self.part_path) < num_frames * frame_bytes:
+            raise ValueError(f"{self.part_path} has fewer than {num_frames} frames, cannot resume")
+        # Frames written after the checkpoint are dropped and simulated again
+        self._part = open(self.part_path, "r+b")
+        self._part.truncate(num_frames * frame_bytes)
+        self._part.seek(0, os.SEEK_END)
+        self.num_frames = num_frames
+
+    def _flush_loop(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                self._full.task_done()
+                return
+            buffer, frames = item
+            try:
+                if self._error is None:
+                    self._part.write(buffer[:frames].tobytes())
+            except Exception as error:
+                self._error = error
+            self._free.put(buffer)
+            self._full.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def _hand_off(self):
+        self._full.put((self._buffer, self._filled))
+        self._buffer = self._free.get()
+        self._filled = 0
+
+    def append(self, frame):
+        self.append_chunk(np.asarray(frame)[None])
+
+    def append_chunk(self, chunk):
+        self._check()
+        start = 0
+        while start < len(chunk):
+            take = min(len(chunk) - start, self.chunk_size - self._filled)
+            self._buffer[self._filled:self._filled + take] = chunk[start:start + take]
+            self._filled += take
+            start += take
+            if self._filled == self.chunk_size:
+                self._hand_off()
+        self.num_frames += len(chunk)
+
+    # Write every frame appended so far through to disk, e.g. before taking a checkpoint
+    def flush(self):
+        self._check()
+        if self._filled:
+            self._hand_off()
+        self._full.join()
+        self._check()
+        self._part.flush()
+        os.fsync(self._part.fileno())
+
+    # Finalize on normal exit, on an uncaught KeyboardInterrupt (SIGINT) and on SIGTERM.
+    # Meant for scripts and command-line entry points: it installs a process-wide SIGTERM
+    # handler until close(), which puts the previous one back.
+    def finalize_on_exit(self):
+        atexit.register(self.close)
+        if threading.current_thread() is threading.main_thread():
+            self._sigterm = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        return self
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        if self._filled:
+            self._hand_off()
+        self._full.put(None)
+        self._thread.join()
+        self._part.close()
+        # Let go of the chunk buffers, a finished writer may be kept around
+        self._buffer = self._free = self._full = None
+        self._check()
+        self._pack()
+        os.remove(self.part_path)
+        if self._sigterm is not None and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._sigterm)
+            self._sigterm = None
+
+    def _pack(self):
+        if self.num_frames:
+            raw = np.memmap(self.part_path, dtype=np.float32, mode="r", shape=(self.num_frames,) + self.frame_shape)
+        else:
+            raw = np.empty((0,) + self.frame_shape, dtype=np.float32)
+        batched = len(self.frame_shape) == 3
+        if batched:
+            shape = (self.frame_shape[0], self.num_frames) + self.frame_shape[1:]
+        else:
+            shape = raw.shape
+        header = {"descr": np.lib.format.dtype_to_descr(raw.dtype), "fortran_order": False, "shape": shape}
+
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            with zf.open("positions.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array_header_2_0(f, header)
+                if batched:
+                    # Transpose a few boards at a time, each block is about one chunk in size
+                    boards = self.frame_shape[0]
+                    step = max(1, self.chunk_size * boards // max(self.num_frames, 1))
+                    for start in range(0, boards, step):
+                        f.write(np.ascontiguousarray(raw[:, start:start + step].swapaxes(0, 1)).tobytes())
+                else:
+                    for start in range(0, self.num_frames, self.chunk_size):
+                        f.write(raw[start:start + self.chunk_size].tobytes())
+            for name, value in self.header.items():
+                with zf.open(name + ".npy", "w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asanyarray(value))
+        del raw
+
+
+# Map an array stored in an uncompressed .npz straight from disk. Copy-on-write mode keeps
+# the views writable (torch.from_numpy needs that) without ever modifying the file.
+def _memmap_npz_member(path, name):
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{path}: compressed '{name}' cannot be memory-mapped")
+    with open(path, "rb") as f:
+        # Skip the zip local file header (30 bytes + file name + extra field)
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack("<HH", f.read(4))
+        f.seek(name_length + extra_length, 1)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+# mmap=True leaves positions on disk, so datasets larger than RAM can be replayed
+# or trained on; only the frames that are actually touched get paged in
+def load_trajectory(path, mmap=False):
+    if str(path).endswith(".csv"):
+        return import_csv(path)
+    with np.load(path) as data:
+        seed = data["seed"]
+        if seed.size == 0:
+            seed = None
+        elif seed.ndim == 0:
+            seed = int(seed)
+        positions = _memmap_npz_member(path, "positions") if mmap else data["positions"]
+        return Trajectory(positions, float(data["fps"]), data["board_size"].tolist(),
+                          data["radius"], seed)
+
+
+# CSV is kept only for import/export: one "x--y" string per coin, as written by
+# carrom_4_slowed_create_csv.py and read by the training notebook
+def import_csv(path, fps=60, board_size=(400, 400), radius=10):
+    df = pd.read_csv(path, index_col=0)
+    positions = np.empty((len(df), len(df.columns), 2), dtype=np.float32)
+    for i, coin in enumerate(df.columns):
+        positions[:, i] = df[coin].str.split("--", expand=True).astype(np.float32).values
+    return Trajectory(positions, fps, board_size, radius)
+
+
+# Stream (frames, coins, 2) chunks into the CSV layout
+def write_csv(path, chunks, num_coins):
+    frames = 0
+    with open(path, "w") as f:
+        f.write("," + ",".join(f"Coin {i}" for i in range(num_coins)) + "\n")
+        for chunk in chunks:
+            lines = []
+            for frame in chunk.tolist():
+                lines.append(f"{frames}," + ",".join(f"{x}--{y}" for x, y in frame))
+                frames += 1
+            f.write("\n".join(lines) + "\n")
+    return frames
+
+
+def export_csv(path, positions, chunk_size=4096):
+    chunks = (positions[start:start + chunk_size] for start in range(0, len(positions), chunk_size))
+    return write_csv(path, chunks, positions.shape[1])